@@ -0,0 +1,259 @@
+import os
+import re
+import sys
+import json
+import stat
+import uuid
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from time import sleep
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class FakeWebDriver:
+    """
+    Class of a chromedriver stand-in speaking the W3C WebDriver http protocol without any browser, so the python side
+    overhead of Chromedriver (selenium, waits, extraction, process handling) can be measured on machines without chrome.
+    Navigations fetch the real page to serve its source, and the page is modeled by its 'rows', 'fields' or 'files' query
+    parameter (see FixtureSite): that many elements match any xpath and the scripts of Chromedriver get answers of that size.
+    Every command can be delayed by 'latency' seconds to emulate the browser round trip
+    """
+    VERSION = "114.0.5735.90"
+    ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+    WINDOW = "fake-window"
+    PNG = ("iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg==")
+    # the first statement of the Chromedriver and wait strategy scripts answered with a page shaped result
+    SCRIPT_EXTRACT = "const fields = arguments[0];"
+    SCRIPT_ACTIONS = "const actions = arguments[0];"
+    SCRIPT_PENDING = "window.__chromedriverPending || 0"
+
+    def __init__(self, host:str="127.0.0.1", port:int=0, latency:float=0):
+        """
+        class constructor. Port 0 picks a free port
+        """
+        self.latency = latency
+        self.sessions = dict()  # session id -> {'url': str, 'source': str, 'count': int, 'cookies': list}
+        self.lock = threading.Lock()
+        handler = type("Handler", (FakeWebDriver.Handler,), {'fake': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve(self):
+        """
+        Serves until the /shutdown endpoint is called, like chromedriver
+        """
+        self.server.serve_forever()
+        self.server.server_close()
+
+    @staticmethod
+    def create_executable(path_dir:str, latency:float=0) -> str:
+        """
+        Writes a launcher of the fake server usable as Chromedriver(path_chromedriver=...) and returns its path
+        """
+        path_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        os.makedirs(path_dir, exist_ok=True)
+        if os.name == 'nt':
+            path_file = os.path.join(path_dir, "chromedriver.cmd")
+            content = (f'@set PYTHONPATH={path_root}\r\n'
+                       f'@"{sys.executable}" -m benchmarks.fake_webdriver --latency={latency} %*\r\n')
+        else:
+            path_file = os.path.join(path_dir, "chromedriver")
+            content = (f'#!/bin/sh\n'
+                       f'PYTHONPATH="{path_root}" exec "{sys.executable}" -m benchmarks.fake_webdriver --latency={latency} "$@"\n')
+        with open(path_file, 'w') as file:
+            file.write(content)
+        os.chmod(path_file, os.stat(path_file).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        return path_file
+
+    def navigate(self, session:dict, url:str):
+        """
+        Loads the source of a given url into the session and models its page size
+        """
+        try:
+            with urllib.request.urlopen(url, timeout=30) as response:
+                source = response.read().decode(errors='replace')
+        except (OSError, ValueError):
+            source = "<html><head></head><body></body></html>"
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+        session.update({'url': url, 'source': source, 'count': int(query.get('rows') or query.get('fields') or query.get('files') or 1)})
+
+    def execute_script(self, session:dict, script:str, args:list):
+        """
+        Answers the known scripts with a result shaped like the current page, any other script returns null
+        """
+        if FakeWebDriver.SCRIPT_EXTRACT in script:
+            return {name: [f"{name} {i}" for i in range(session['count'])] for name in args[0]}
+        if FakeWebDriver.SCRIPT_ACTIONS in script:
+            return [{'ok': True, 'error': None} for _ in args[0]]
+        if FakeWebDriver.SCRIPT_PENDING in script:
+            return 0
+        return None
+
+    def route(self, method:str, path:str, body:dict):
+        """
+        Returns the value of a WebDriver command, raises KeyError for the unknown ones
+        """
+        if method == 'POST' and path == '/session':
+            session_id = uuid.uuid4().hex
+            with self.lock:
+                self.sessions[session_id] = {'url': "about:blank", 'source': "<html><head></head><body></body></html>", 'count': 1, 'cookies': list()}
+            return {'sessionId': session_id,
+                    'capabilities': {'browserName': "chrome",
+                                     'browserVersion': FakeWebDriver.VERSION,
+                                     'platformName': sys.platform,
+                                     'goog:chromeOptions': {'debuggerAddress': "127.0.0.1:0"},
+                                     'chrome': {'chromedriverVersion': FakeWebDriver.VERSION}}}
+        if path == '/status':
+            return {'ready': True, 'message': "fake"}
+        match = re.fullmatch(r'/session/([^/]+)(/.*)?', path)
+        if match is None:
+            raise KeyError(path)
+        session = self.sessions[match.group(1)]
+        command = match.group(2) or ''
+        if method == 'DELETE' and command == '':
+            with self.lock:
+                del self.sessions[match.group(1)]
+            return None
+        if command == '/url':
+            if method == 'POST':
+                self.navigate(session, body['url'])
+                return None
+            return session['url']
+        if command == '/refresh':
+            self.navigate(session, session['url'])
+            return None
+        if command == '/source':
+            return session['source']
+        if command == '/title':
+            match = re.search(r'<title>(.*?)</title>', session['source'])
+            return match.group(1) if match else ""
+        if command == '/element' or re.fullmatch(r'/element/[^/]+/element', command):
+            return {FakeWebDriver.ELEMENT_KEY: "element-0"}
+        if command == '/elements' or re.fullmatch(r'/element/[^/]+/elements', command):
+            return [{FakeWebDriver.ELEMENT_KEY: f"element-{i}"} for i in range(session['count'])]
+        if re.fullmatch(r'/element/[^/]+/(click|clear|value)', command):
+            return None
+        if re.fullmatch(r'/element/[^/]+/text', command):
+            return "text"
+        if re.fullmatch(r'/element/[^/]+/(attribute|property|css)/[^/]+', command):
+            return None
+        if re.fullmatch(r'/element/[^/]+/(enabled|displayed|selected)', command):
+            return True
+        if re.fullmatch(r'/element/[^/]+/rect', command):
+            return {'x': 0, 'y': 0, 'width': 100, 'height': 20}
+        if command in ('/execute/sync', '/execute/async'):
+            return self.execute_script(session, body.get('script', ""), body.get('args', list()))
+        if command == '/timeouts' and method == 'GET':
+            return {'implicit': 0, 'pageLoad': 300000, 'script': 30000}
+        if command == '/cookie':
+            return self.cookie(session, method, body)
+        if command in ('/timeouts', '/actions', '/window/maximize'):
+            return None
+        if command == '/window':
+            return FakeWebDriver.WINDOW if method == 'GET' else None
+        if command == '/window/handles':
+            return [FakeWebDriver.WINDOW]
+        if command == '/screenshot':
+            return FakeWebDriver.PNG
+        if command == '/se/log':
+            return list()
+        if command in ('/chromium/send_command', '/goog/cdp/execute', '/chromium/send_command_and_get_result'):
+            return self.execute_cdp(session, body.get('cmd'), body.get('params') or dict())
+        raise KeyError(path)
+
+    def cookie(self, session:dict, method:str, body:dict):
+        """
+        Stores the cookies added to a session, on the host of its current url
+        """
+        if method == 'GET':
+            return session['cookies']
+        if method == 'DELETE':
+            session['cookies'] = list()
+            return None
+        cookie = dict(body['cookie'])
+        cookie.setdefault('domain', urllib.parse.urlsplit(session['url']).hostname)
+        cookie.setdefault('path', "/")
+        session['cookies'] = [c for c in session['cookies'] if c['name'] != cookie['name']] + [cookie]
+        return None
+
+    def execute_cdp(self, session:dict, cmd:str, params:dict) -> dict:
+        """
+        Answers the devtools commands whose results Chromedriver reads, the other ones return an empty result
+        """
+        if cmd == 'Network.getAllCookies':
+            return {'cookies': [dict(c, session='expiry' not in c) for c in session['cookies']]}
+        if cmd == 'Network.setCookies':
+            for cookie in params['cookies']:
+                session['cookies'] = [c for c in session['cookies'] if c['name'] != cookie['name']] + [dict(cookie)]
+            return dict()
+        if cmd == 'Network.clearBrowserCookies':
+            session['cookies'] = list()
+            return dict()
+        if cmd == 'Page.addScriptToEvaluateOnNewDocument':
+            return {'identifier': uuid.uuid4().hex}
+        return dict()
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        Request handler of the WebDriver endpoints
+        """
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True   # headers and body are written apart, delayed acks would add 40ms per response
+        fake = None
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/shutdown':
+                # stops listening before answering, selenium sleeps a whole second when the port still accepts connections
+                self.server.socket.close()
+                self.send_json(200, {'value': None})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            self.handle_command('GET')
+
+        def do_POST(self):
+            self.handle_command('POST')
+
+        def do_DELETE(self):
+            self.handle_command('DELETE')
+
+        def handle_command(self, method:str):
+            length = int(self.headers.get('Content-Length') or 0)
+            data = self.rfile.read(length) if length > 0 else b''
+            if self.fake.latency > 0:
+                sleep(self.fake.latency)
+            try:
+                body = json.loads(data) if data else dict()
+                self.send_json(200, {'value': self.fake.route(method, self.path, body)})
+            except KeyError:
+                self.send_json(404, {'value': {'error': "unknown command", 'message': f"{method} {self.path}", 'stacktrace': ""}})
+            except Exception as e:
+                self.send_json(500, {'value': {'error': "unknown error", 'message': repr(e), 'stacktrace': ""}})
+
+        def send_json(self, status:int, payload:dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9515)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--version", action="store_true")
+    args, _ = parser.parse_known_args()
+    if args.version:
+        print(f"ChromeDriver {FakeWebDriver.VERSION} (fake)")
+        sys.exit(0)
+    FakeWebDriver(port=args.port, latency=args.latency).serve()
@@ -0,0 +1,141 @@
+import threading
+import urllib.parse
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+class FixtureSite:
+    """
+    Class to serve the benchmark fixture pages from a local http server:
+        /table?rows=N&columns=M          large table, rows under //table[@id='data']/tbody/tr
+        /form?fields=N                   long form of text inputs and selects named field_0..field_N-1
+        /downloads?files=N&size=BYTES    page of download links
+        /file/NAME?size=BYTES            attachment of a given size
+    """
+    CHUNK_SIZE = 1024*64    # bytes
+    SELECT_EVERY = 5        # every fifth form field is a select
+    OPTIONS = ['alpha', 'beta', 'gamma', 'delta']
+
+    def __init__(self, host:str="127.0.0.1", port:int=0):
+        """
+        class constructor. Port 0 picks a free port
+        """
+        self.server = ThreadingHTTPServer((host, port), FixtureSite.Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    def __enter__(self) -> 'FixtureSite':
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Serves the pages on a background thread
+        """
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """
+        Stops the server
+        """
+        if self.thread is not None:
+            self.server.shutdown()
+            self.thread = None
+        self.server.server_close()
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def render_table(rows:int, columns:int) -> bytes:
+        """
+        Returns a table page, the first cell of each row links to its item
+        """
+        header = "".join(f"<th>column {c}</th>" for c in range(columns))
+        body = "".join(f'<tr><td><a href="/item/{r}">item {r}</a></td>'
+                       + "".join(f"<td>{r}-{c}</td>" for c in range(1, columns))
+                       + "</tr>" for r in range(rows))
+        return FixtureSite.render_page("Table", f'<table id="data"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>')
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def render_form(fields:int) -> bytes:
+        """
+        Returns a form page of text inputs with a select every SELECT_EVERY fields
+        """
+        inputs = list()
+        for i in range(fields):
+            if i % FixtureSite.SELECT_EVERY == FixtureSite.SELECT_EVERY - 1:
+                options = "".join(f'<option value="{o}">{o}</option>' for o in FixtureSite.OPTIONS)
+                inputs.append(f'<label>field {i} <select id="field_{i}" name="field_{i}">{options}</select></label>')
+            else:
+                inputs.append(f'<label>field {i} <input type="text" id="field_{i}" name="field_{i}"></label>')
+        return FixtureSite.render_page("Form", f'<form id="form" action="/form" method="get">{"<br>".join(inputs)}'
+                                               '<button id="submit" type="submit">submit</button></form>')
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def render_downloads(files:int, size:int) -> bytes:
+        """
+        Returns a page linking files of a given size
+        """
+        links = "".join(f'<li><a class="download" href="/file/file_{i}.bin?size={size}">file {i}</a></li>' for i in range(files))
+        return FixtureSite.render_page("Downloads", f'<ul id="downloads">{links}</ul>')
+
+    @staticmethod
+    def render_page(title:str, body:str) -> bytes:
+        return f"<!DOCTYPE html><html><head><title>{title}</title></head><body>{body}</body></html>".encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        Request handler of the fixture pages
+        """
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True   # headers and body are written apart, delayed acks would add 40ms per response
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+            try:
+                if url.path == "/table":
+                    self.send_html(FixtureSite.render_table(int(query.get('rows', 1000)), int(query.get('columns', 5))))
+                elif url.path == "/form":
+                    self.send_html(FixtureSite.render_form(int(query.get('fields', 50))))
+                elif url.path == "/downloads":
+                    self.send_html(FixtureSite.render_downloads(int(query.get('files', 1)), int(query.get('size', 1024*1024))))
+                elif url.path.startswith("/file/"):
+                    self.send_file(url.path.rsplit('/', 1)[-1], int(query.get('size', 1024*1024)))
+                elif url.path.startswith("/item/"):
+                    self.send_html(FixtureSite.render_page("Item", f'<h1 id="item">{url.path}</h1>'))
+                else:
+                    self.send_error(404)
+            except ValueError:
+                self.send_error(400)
+
+        def send_html(self, body:bytes):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_file(self, name:str, size:int):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+            self.send_header("Content-Length", str(size))
+            self.end_headers()
+            chunk = b'\0'*FixtureSite.CHUNK_SIZE
+            remaining = size
+            while remaining > 0:
+                self.wfile.write(chunk[:remaining])
+                remaining -= FixtureSite.CHUNK_SIZE
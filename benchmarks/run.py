@@ -0,0 +1,267 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from time import perf_counter, strftime
+
+import selenium
+
+from src.chromedriver import Chromedriver, ChromedriverManager, VersionCache, Metrics
+from src.chromedriver import dom_snapshot
+from .fixture_site import FixtureSite
+from .fake_webdriver import FakeWebDriver
+
+class BenchmarkSuite:
+    """
+    Class to time Chromedriver against the local fixture site and report comparable json results.
+    With fake the sessions run against FakeWebDriver instead of chrome, measuring only the python side overhead.
+    Usage, from the repository root:
+        python -m benchmarks.run --fake --output results.json
+        python -m benchmarks.run --chromedriver path/to/chromedriver --baseline results.json
+    """
+    BENCHMARKS = ('startup', 'manage_chromedriver', 'extraction', 'form_fill', 'downloads')
+
+    def __init__(self, fake:bool=False, path_chromedriver:str=None, iterations:int=5, rows:int=1000, columns:int=5, fields:int=50,
+                 files:int=3, file_size:int=1024*1024, latency:float=0, headless:bool=True, metrics:bool=False):
+        """
+        class constructor
+        """
+        self.fake = fake
+        self.path_chromedriver = path_chromedriver
+        self.iterations = iterations
+        self.rows = rows
+        self.columns = columns
+        self.fields = fields
+        self.files = files
+        self.file_size = file_size
+        self.latency = latency
+        self.headless = headless
+        self.metrics = Metrics() if metrics else None
+        self.timings = dict()   # name -> list of seconds
+        self.skipped = dict()   # benchmark -> reason
+        self.site = None
+        self.path_tmp = None
+
+    def new_chromedriver(self, **kwargs) -> Chromedriver:
+        return Chromedriver(path_chromedriver=self.path_chromedriver, headless=self.headless, metrics=self.metrics, **kwargs)
+
+    def record(self, name:str, seconds:float):
+        self.timings.setdefault(name, list()).append(seconds)
+
+    def timed(self, name:str, fn):
+        """
+        Runs fn, records its duration under a given name and returns its result
+        """
+        start = perf_counter()
+        result = fn()
+        self.record(name, perf_counter() - start)
+        return result
+
+    def run(self, benchmarks:list[str]=None) -> dict:
+        """
+        Runs the given benchmarks (all by default) and returns the results
+        """
+        benchmarks = BenchmarkSuite.BENCHMARKS if benchmarks is None else benchmarks
+        for benchmark in benchmarks:
+            if benchmark not in BenchmarkSuite.BENCHMARKS:
+                raise Exception(f"Benchmark '{benchmark}' not known, use one of {BenchmarkSuite.BENCHMARKS}.")
+        self.path_tmp = tempfile.mkdtemp(prefix="chromedriver-bench-")
+        if self.fake:
+            self.path_chromedriver = FakeWebDriver.create_executable(self.path_tmp, self.latency)
+        try:
+            with FixtureSite() as self.site:
+                for benchmark in benchmarks:
+                    print(f"Running benchmark '{benchmark}'.")
+                    getattr(self, "bench_" + benchmark)()
+        finally:
+            shutil.rmtree(self.path_tmp, ignore_errors=True)
+        return self.get_results()
+
+    def bench_startup(self):
+        """
+        Times the session startup (chromedriver and browser launch) and its teardown
+        """
+        for _ in range(self.iterations):
+            chrome = self.timed("startup.launch", self.new_chromedriver)
+            self.timed("startup.close", chrome.close)
+
+    def bench_manage_chromedriver(self):
+        """
+        Times manage_chromedriver on an empty version cache (cold) and on a populated one (warm)
+        """
+        if self.fake or self.path_chromedriver is None or ChromedriverManager.get_chrome_binary_path() is None:
+            self.skipped['manage_chromedriver'] = "needs chrome and a chromedriver path"
+            return
+        version_cache = ChromedriverManager.version_cache
+        try:
+            for i in range(self.iterations):
+                ChromedriverManager.version_cache = VersionCache(os.path.join(self.path_tmp, f"versions-{i}.json"))
+                self.timed("manage_chromedriver.cold", lambda: ChromedriverManager.manage_chromedriver(self.path_chromedriver))
+                self.timed("manage_chromedriver.warm", lambda: ChromedriverManager.manage_chromedriver(self.path_chromedriver))
+        finally:
+            ChromedriverManager.version_cache = version_cache
+
+    def bench_extraction(self):
+        """
+        Times reading a large table: navigation, batched extraction, column text and a local snapshot extraction
+        """
+        url = f"{self.site.url}/table?rows={self.rows}&columns={self.columns}"
+        rows_xpath = "//table[@id='data']/tbody/tr"
+        fields = {f"column_{c}": (f"./td[{c + 1}]", Chromedriver.TEXT) for c in range(self.columns)}
+        fields['link'] = ("./td[1]/a", 'href')
+        chrome = self.new_chromedriver()
+        try:
+            for _ in range(self.iterations):
+                self.timed("extraction.get", lambda: chrome.get(url))
+                self.timed("extraction.extract", lambda: chrome.extract(fields, rows_xpath))
+                self.timed("extraction.get_elements_text", lambda: chrome.get_elements_text(rows_xpath + "/td[2]"))
+                if dom_snapshot.lxml is not None:
+                    self.timed("extraction.snapshot_extract", lambda: chrome.snapshot().extract(fields, rows_xpath))
+                    chrome.invalidate_snapshot()
+        finally:
+            chrome.close()
+
+    def bench_form_fill(self):
+        """
+        Times filling a long form field by field through WebDriver and in a single round trip with run_actions
+        """
+        url = f"{self.site.url}/form?fields={self.fields}"
+        actions = list()
+        for i in range(self.fields):
+            if i % FixtureSite.SELECT_EVERY == FixtureSite.SELECT_EVERY - 1:
+                actions.append({'action': 'select', 'xpath': f"//*[@id='field_{i}']", 'value': FixtureSite.OPTIONS[i % len(FixtureSite.OPTIONS)]})
+            else:
+                actions.append({'action': 'set_value', 'xpath': f"//*[@id='field_{i}']", 'value': f"value {i}"})
+        per_step = [dict(action, real_keys=True) for action in actions]
+        chrome = self.new_chromedriver()
+        try:
+            for _ in range(self.iterations):
+                chrome.get(url)
+                self.timed("form_fill.per_step", lambda: chrome.run_actions(per_step))
+                chrome.get(url)
+                self.timed("form_fill.run_actions", lambda: chrome.run_actions(actions))
+        finally:
+            chrome.close()
+
+    def bench_downloads(self):
+        """
+        Times clicking the download links of a page until every file is on disk
+        """
+        if self.fake:
+            self.skipped['downloads'] = "needs chrome, downloads are tracked through devtools events"
+            return
+        url = f"{self.site.url}/downloads?files={self.files}&size={self.file_size}"
+        chrome = self.new_chromedriver(download=True, path_downloads=os.path.join(self.path_tmp, "downloads"), isolate_downloads=True)
+        try:
+            for _ in range(self.iterations):
+                chrome.get(url)
+                def download():
+                    for i in range(self.files):
+                        chrome.click(f"(//a[@class='download'])[{i + 1}]", wait=0)
+                    chrome.wait_for_downloads(expected=self.files)
+                self.timed("downloads.download", download)
+        finally:
+            chrome.close()
+
+    @staticmethod
+    def get_git_commit() -> str:
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+        except OSError:
+            return None
+
+    def get_results(self) -> dict:
+        """
+        Returns the summary of every timing with the environment needed to compare runs
+        """
+        results = dict()
+        for name, timings in self.timings.items():
+            results[name] = {'n': len(timings),
+                             'mean': statistics.mean(timings),
+                             'median': statistics.median(timings),
+                             'min': min(timings),
+                             'max': max(timings),
+                             'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0}
+        return {
+            'meta': {
+                'timestamp': strftime("%Y-%m-%dT%H:%M:%S%z"),
+                'commit': BenchmarkSuite.get_git_commit(),
+                'mode': "fake" if self.fake else "chrome",
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'selenium': selenium.__version__,
+                'parameters': {'iterations': self.iterations, 'rows': self.rows, 'columns': self.columns, 'fields': self.fields,
+                               'files': self.files, 'file_size': self.file_size, 'latency': self.latency, 'headless': self.headless},
+            },
+            'results': results,
+            'skipped': self.skipped,
+            'metrics': self.metrics.to_dict() if self.metrics is not None else None,
+        }
+
+    @staticmethod
+    def compare(results:dict, baseline:dict) -> str:
+        """
+        Returns a table of the median of each timing against a baseline run
+        """
+        lines = [f"{'benchmark':<34}{'baseline':>12}{'current':>12}{'ratio':>9}"]
+        for name, result in results['results'].items():
+            reference = baseline['results'].get(name)
+            if reference is None:
+                lines.append(f"{name:<34}{'-':>12}{result['median']:>12.4f}{'-':>9}")
+            else:
+                ratio = result['median']/reference['median'] if reference['median'] > 0 else float('inf')
+                lines.append(f"{name:<34}{reference['median']:>12.4f}{result['median']:>12.4f}{ratio:>9.2f}")
+        if baseline['meta'].get('mode') != results['meta']['mode'] or baseline['meta'].get('parameters') != results['meta']['parameters']:
+            lines.append("Warning: the baseline ran with a different mode or parameters.")
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_results(results:dict) -> str:
+        lines = [f"{'benchmark':<34}{'median':>10}{'mean':>10}{'min':>10}{'max':>10}"]
+        for name, result in results['results'].items():
+            lines.append(f"{name:<34}{result['median']:>10.4f}{result['mean']:>10.4f}{result['min']:>10.4f}{result['max']:>10.4f}")
+        for benchmark, reason in results['skipped'].items():
+            lines.append(f"{benchmark:<34}skipped: {reason}")
+        return "\n".join(lines)
+
+
+def main(argv:list[str]=None):
+    parser = argparse.ArgumentParser(description="Chromedriver benchmarks against a local fixture site")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run among {', '.join(BenchmarkSuite.BENCHMARKS)}, all by default")
+    parser.add_argument("--fake", action="store_true", help="run against the fake WebDriver server instead of chrome")
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every fake WebDriver command")
+    parser.add_argument("--chromedriver", default=None, help="chromedriver path")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--columns", type=int, default=5)
+    parser.add_argument("--fields", type=int, default=50)
+    parser.add_argument("--files", type=int, default=3)
+    parser.add_argument("--file-size", type=int, default=1024*1024)
+    parser.add_argument("--headful", action="store_true", help="run chrome with a window")
+    parser.add_argument("--metrics", action="store_true", help="include the per method and command histograms")
+    parser.add_argument("--output", default=None, help="json file receiving the results")
+    parser.add_argument("--baseline", default=None, help="json results of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    suite = BenchmarkSuite(fake=args.fake, path_chromedriver=args.chromedriver, iterations=args.iterations, rows=args.rows,
+                           columns=args.columns, fields=args.fields, files=args.files, file_size=args.file_size,
+                           latency=args.latency, headless=not args.headful, metrics=args.metrics)
+    results = suite.run(args.benchmarks or None)
+    print(BenchmarkSuite.format_results(results))
+    if args.output is not None:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results saved to '{args.output}'.")
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as file:
+            print(BenchmarkSuite.compare(results, json.load(file)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1 +1,16 @@
-from .chromedriver import Chromedriver
\ No newline at end of file
+from .chromedriver import Chromedriver
+from .pool import ChromedriverPool
+from .wait_strategy import WaitStrategy, FixedDelay, ElementClickable, ElementStable, DomQuiescence, NetworkIdle, CompositeWait
+from .dom_snapshot import DomSnapshot
+from .chromedriver_manager import ChromedriverManager
+from .version_cache import VersionCache
+from .shared_service import SharedService
+from .tab_pool import TabPool
+from .crawl_runner import CrawlRunner
+from .metrics import Metrics
+from .cdp import CDPConnection
+from .response_cache import ResponseCache
+from .download_manager import DownloadManager
+from .element_cache import ElementCache
+from .process_registry import ProcessRegistry
+from .async_chromedriver import AsyncChromedriver
\ No newline at end of file
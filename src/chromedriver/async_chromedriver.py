@@ -0,0 +1,225 @@
+import asyncio
+import functools
+from time import monotonic
+from concurrent.futures import ThreadPoolExecutor
+from selenium.webdriver.common.keys import Keys
+
+from .chromedriver import Chromedriver
+from .wait_strategy import WaitStrategy, FixedDelay
+from .dom_snapshot import DomSnapshot
+from .metrics import Metrics
+
+class AsyncChromedriver:
+    """
+    Class to drive a Chromedriver from asyncio. The blocking WebDriver calls run on a bounded thread pool shared by every session,
+    one call at a time per session, and the waits after interactions poll the browser from the event loop instead of sleeping
+    on a pool thread, so a single loop can drive dozens of browsers with a handful of threads
+    """
+    MAX_WORKERS = 16
+    __executor = None
+
+    def __init__(self, chromedriver:Chromedriver, executor:ThreadPoolExecutor=None):
+        """
+        class constructor. Wraps a running Chromedriver, use 'await AsyncChromedriver.create(...)' to launch a new one
+        """
+        self.chromedriver = chromedriver
+        self.executor = AsyncChromedriver.get_executor() if executor is None else executor
+        self.__lock = asyncio.Lock()
+
+    async def __aenter__(self) -> 'AsyncChromedriver':
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def metrics(self) -> Metrics:
+        """
+        Metrics of the wrapped Chromedriver, the coroutine interactions are timed into it
+        """
+        return self.chromedriver.metrics
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        """
+        Returns the thread pool shared by the sessions, created on first use with MAX_WORKERS threads
+        """
+        if cls.__executor is None:
+            cls.__executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix="chromedriver")
+        return cls.__executor
+
+    @classmethod
+    async def create(cls, executor:ThreadPoolExecutor=None, **chromedriver_kwargs) -> 'AsyncChromedriver':
+        """
+        Launches a Chromedriver with the given arguments without blocking the event loop
+        """
+        executor = cls.get_executor() if executor is None else executor
+        chromedriver = await asyncio.get_running_loop().run_in_executor(executor, functools.partial(Chromedriver, **chromedriver_kwargs))
+        return cls(chromedriver, executor)
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Awaits a blocking call on the thread pool. The calls of a session never overlap, the driver is not thread safe
+        """
+        async with self.__lock:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def close(self):
+        """
+        Closes the session
+        """
+        await self.run(self.chromedriver.close)
+
+    async def wait(self, xpath:str=None, delay:float=0, wait:WaitStrategy|float=None):
+        """
+        Awaits the page readiness like Chromedriver.wait, the pauses between polls leave the pool thread free
+        """
+        strategy = self.chromedriver.get_wait_strategy(wait)
+        if isinstance(strategy, FixedDelay) and strategy.seconds == 0:
+            return
+        start = monotonic()
+        try:
+            await strategy.wait_async(self.chromedriver.driver, self.run, xpath, delay)
+        finally:
+            elapsed = monotonic() - start
+            self.chromedriver.wait_time += elapsed
+            if self.chromedriver.metrics is not None:
+                self.chromedriver.metrics.observe("wait." + type(strategy).__name__, elapsed)
+
+    async def get(self, url:str):
+        """
+        Access a given url
+        """
+        await self.run(self.chromedriver.get, url)
+
+    async def refresh(self):
+        """
+        Refreshes the page
+        """
+        await self.run(self.chromedriver.refresh)
+
+    async def run_steps(self, steps, wait:WaitStrategy|float=None):
+        """
+        Runs an interaction generator of Chromedriver (see Chromedriver.run_steps), its blocking steps on the thread pool and its waits
+        awaited here, returns its result
+        """
+        while True:
+            done, value = await self.run(Chromedriver.next_step, steps)
+            if done:
+                return value
+            await self.wait(*value, wait)
+
+    @Metrics.timed
+    async def click(self, xpath:str, wait:WaitStrategy|float=None):
+        """
+        Clicks in a given element
+        """
+        await self.run_steps(self.chromedriver.click_steps(xpath, wait), wait)
+
+    @Metrics.timed
+    async def escape(self, wait:WaitStrategy|float=None):
+        """
+        Presses ESC
+        """
+        await self.run_steps(self.chromedriver.escape_steps(wait), wait)
+
+    @Metrics.timed
+    async def press_tab(self, xpath:str, wait:WaitStrategy|float=None):
+        """
+        Presses TAB
+        """
+        await self.send_keys(xpath, Keys.TAB, wait)
+
+    @Metrics.timed
+    async def send_keys(self, xpath:str, keys:str, wait:WaitStrategy|float=None):
+        """
+        Sends the given string to an element
+        """
+        await self.run_steps(self.chromedriver.send_keys_steps(xpath, keys, wait), wait)
+
+    @Metrics.timed
+    async def press_key(self, xpath:str, key:str, wait:WaitStrategy|float=None):
+        """
+        Presses a key on a given element without clearing it
+        """
+        await self.run_steps(self.chromedriver.press_key_steps(xpath, key, wait), wait)
+
+    @Metrics.timed
+    async def drop_down(self, xpath:str, keys:str, wait:WaitStrategy|float=None):
+        """
+        Selects a given string from a dropdown element
+        """
+        await self.run_steps(self.chromedriver.drop_down_steps(xpath, keys, wait), wait)
+
+    @Metrics.timed
+    async def run_actions(self, actions:list[dict], stop_on_error:bool=True, wait:WaitStrategy|float=None) -> list[dict]:
+        """
+        Runs a list of form actions like Chromedriver.run_actions, awaiting the waits of the 'real_keys' actions
+        """
+        return await self.run_steps(self.chromedriver.run_actions_steps(actions, stop_on_error, wait), wait)
+
+    async def snapshot(self) -> DomSnapshot:
+        """
+        Captures the page source for local read-only queries
+        """
+        return await self.run(self.chromedriver.snapshot)
+
+    async def get_element_attribute(self, xpath:str, attribute:str) -> str:
+        """
+        Returns the given attribute of a given element xpath
+        """
+        return await self.run(self.chromedriver.get_element_attribute, xpath, attribute)
+
+    async def get_elements_attribute(self, xpath:str, attribute:str) -> list:
+        """
+        Return a list of a given attribute for a given element xpath
+        """
+        return await self.run(self.chromedriver.get_elements_attribute, xpath, attribute)
+
+    async def check_element_exists(self, xpath:str) -> bool:
+        """
+        Verifies if a given element xpath exists
+        """
+        return await self.run(self.chromedriver.check_element_exists, xpath)
+
+    async def get_element_text(self, xpath:str) -> str:
+        """
+        Returns the text of a given xpath element
+        """
+        return await self.run(self.chromedriver.get_element_text, xpath)
+
+    async def get_elements_text(self, xpath:str) -> list:
+        """
+        Returns a list of text of a given xpath element
+        """
+        return await self.run(self.chromedriver.get_elements_text, xpath)
+
+    async def extract(self, fields:dict[str,tuple[str,str]], rows_xpath:str=None, columnar:bool=False) -> list[dict]|dict[str,list]:
+        """
+        Extracts several xpaths and attributes with a single browser round trip, see Chromedriver.extract
+        """
+        return await self.run(self.chromedriver.extract, fields, rows_xpath, columnar)
+
+    async def screenshot(self, path_file:str):
+        """
+        Takes a screenshot and saves in the given path
+        """
+        await self.run(self.chromedriver.screenshot, path_file)
+
+    async def switch_window(self, window:str):
+        """
+        Switches the driver to the given window
+        """
+        await self.run(self.chromedriver.switch_window, window)
+
+    async def is_alive(self) -> bool:
+        """
+        Verifies if the browser session still answers
+        """
+        return await self.run(self.chromedriver.is_alive)
+
+    async def reset(self):
+        """
+        Cleans the session state without restarting the browser
+        """
+        await self.run(self.chromedriver.reset)
@@ -0,0 +1,239 @@
+import os
+import json
+import queue
+import base64
+import socket
+import struct
+import threading
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+class CDPConnection:
+    """
+    Class to talk to a chrome devtools target through its websocket, receiving the protocol events the
+    chromedriver send_command endpoint can not deliver. Events are dispatched on a separate thread, so the
+    callbacks may send commands themselves
+    """
+    TIMEOUT = 30    # seconds
+    OPCODE_TEXT = 0x1
+    OPCODE_CLOSE = 0x8
+    OPCODE_PING = 0x9
+    OPCODE_PONG = 0xA
+
+    def __init__(self, ws_url:str):
+        """
+        class constructor. Connects to a given devtools websocket url
+        """
+        self.ws_url = ws_url
+        self.callbacks = defaultdict(list)
+        self.closed = False
+        self.__next_id = 0
+        self.__pending = dict()     # command id -> [threading.Event, response]
+        self.__lock = threading.Lock()
+        self.__send_lock = threading.Lock()
+        self.__events = queue.Queue()
+        self.__buffer = b''
+        self.__socket = self.__connect()
+        self.__reader = threading.Thread(target=self.__read_loop, daemon=True)
+        self.__dispatcher = threading.Thread(target=self.__dispatch_loop, daemon=True)
+        self.__reader.start()
+        self.__dispatcher.start()
+
+    def __del__(self):
+        """
+        Class destructor
+        """
+        if hasattr(self, '_CDPConnection__socket'):
+            self.close()
+
+    @staticmethod
+    def get_page_ws_url(debugger_address:str, target_id:str) -> str:
+        """
+        Returns the websocket url of a page target. Chromedriver window handles are the devtools target ids
+        """
+        return f"ws://{debugger_address}/devtools/page/{target_id}"
+
+    @staticmethod
+    def get_browser_ws_url(debugger_address:str) -> str:
+        """
+        Returns the websocket url of the browser target
+        """
+        with urllib.request.urlopen(f"http://{debugger_address}/json/version", timeout=CDPConnection.TIMEOUT) as response:
+            return json.loads(response.read())["webSocketDebuggerUrl"]
+
+    def __connect(self) -> socket.socket:
+        """
+        Opens the socket and performs the websocket handshake
+        """
+        url = urllib.parse.urlparse(self.ws_url)
+        sock = socket.create_connection((url.hostname, url.port or 80), timeout=CDPConnection.TIMEOUT)
+        key = base64.b64encode(os.urandom(16)).decode()
+        request = (f"GET {url.path or '/'} HTTP/1.1\r\n"
+                   f"Host: {url.hostname}:{url.port or 80}\r\n"
+                   "Upgrade: websocket\r\n"
+                   "Connection: Upgrade\r\n"
+                   f"Sec-WebSocket-Key: {key}\r\n"
+                   "Sec-WebSocket-Version: 13\r\n\r\n")
+        sock.sendall(request.encode())
+        response = b''
+        while b'\r\n\r\n' not in response:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise Exception(f"Devtools websocket '{self.ws_url}' closed during the handshake.")
+            response += chunk
+        header, _, rest = response.partition(b'\r\n\r\n')
+        status_line = header.split(b'\r\n')[0].decode()
+        if ' 101 ' not in status_line:
+            raise Exception(f"Devtools websocket handshake failed: {status_line}")
+        sock.settimeout(None)
+        self.__buffer = rest
+        return sock
+
+    def __send_frame(self, opcode:int, payload:bytes):
+        """
+        Sends a single masked websocket frame
+        """
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack('!H', length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack('!Q', length)
+        mask = os.urandom(4)
+        masked = self.__mask(payload, mask)
+        with self.__send_lock:
+            self.__socket.sendall(header + mask + masked)
+
+    @staticmethod
+    def __mask(payload:bytes, mask:bytes) -> bytes:
+        """
+        Masks a payload using a single integer xor instead of a byte loop
+        """
+        if not payload:
+            return payload
+        repeated = (mask * (len(payload)//4 + 1))[:len(payload)]
+        return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+    def __recv_exact(self, size:int) -> bytes:
+        """
+        Reads exactly size bytes from the socket
+        """
+        while len(self.__buffer) < size:
+            chunk = self.__socket.recv(max(size - len(self.__buffer), 65536))
+            if not chunk:
+                raise ConnectionError("Devtools websocket closed.")
+            self.__buffer += chunk
+        data, self.__buffer = self.__buffer[:size], self.__buffer[size:]
+        return data
+
+    def __recv_message(self) -> str:
+        """
+        Reads a complete (possibly fragmented) text message, answering pings on the way
+        """
+        message = b''
+        while True:
+            first, second = self.__recv_exact(2)
+            fin, opcode = first & 0x80, first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', self.__recv_exact(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self.__recv_exact(8))[0]
+            payload = self.__recv_exact(length)
+            if opcode == CDPConnection.OPCODE_PING:
+                self.__send_frame(CDPConnection.OPCODE_PONG, payload)
+                continue
+            if opcode == CDPConnection.OPCODE_CLOSE:
+                raise ConnectionError("Devtools websocket closed.")
+            message += payload
+            if fin:
+                return message.decode()
+
+    def __read_loop(self):
+        """
+        Reader thread: routes the command responses to their callers and queues the events
+        """
+        try:
+            while not self.closed:
+                message = json.loads(self.__recv_message())
+                if 'id' in message:
+                    with self.__lock:
+                        pending = self.__pending.pop(message['id'], None)
+                    if pending is not None:
+                        pending[1] = message
+                        pending[0].set()
+                else:
+                    self.__events.put(message)
+        except (OSError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.closed = True
+            self.__events.put(None)
+            with self.__lock:
+                pending, self.__pending = list(self.__pending.values()), dict()
+            for item in pending:
+                item[0].set()
+
+    def __dispatch_loop(self):
+        """
+        Dispatcher thread: calls the event callbacks
+        """
+        while True:
+            message = self.__events.get()
+            if message is None:
+                return
+            for callback in list(self.callbacks.get(message.get('method'), list())):
+                try:
+                    callback(message.get('params', dict()))
+                except Exception as e:
+                    print(f"Error handling devtools event '{message.get('method')}': {e!r}")
+
+    def on(self, event:str, callback):
+        """
+        Registers a callback receiving the params of a given devtools event
+        """
+        self.callbacks[event].append(callback)
+
+    def execute(self, method:str, params:dict=None, timeout:float=None) -> dict:
+        """
+        Sends a devtools command and returns its result
+        """
+        if self.closed:
+            raise ConnectionError("Devtools websocket closed.")
+        with self.__lock:
+            self.__next_id += 1
+            command_id = self.__next_id
+            pending = [threading.Event(), None]
+            self.__pending[command_id] = pending
+        message = {'id': command_id, 'method': method, 'params': dict() if params is None else params}
+        self.__send_frame(CDPConnection.OPCODE_TEXT, json.dumps(message).encode())
+        if not pending[0].wait(CDPConnection.TIMEOUT if timeout is None else timeout):
+            with self.__lock:
+                self.__pending.pop(command_id, None)
+            raise TimeoutError(f"Devtools command '{method}' got no response.")
+        response = pending[1]
+        if response is None:
+            raise ConnectionError("Devtools websocket closed.")
+        if 'error' in response:
+            raise Exception(f"Devtools command '{method}' failed: {response['error'].get('message')}")
+        return response.get('result', dict())
+
+    def close(self):
+        """
+        Closes the websocket
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.__send_frame(CDPConnection.OPCODE_CLOSE, b'')
+        except OSError:
+            pass
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+            self.__socket.close()
+        except OSError:
+            pass
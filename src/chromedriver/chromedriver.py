@@ -1,16 +1,31 @@
 import os
+import json
+import shutil
+import tempfile
+import urllib.parse
+import urllib.request
 import psutil
-from time import sleep
+from time import monotonic, perf_counter
 from selenium.webdriver import Chrome, ChromeOptions, ActionChains
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import WebDriverException, StaleElementReferenceException
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.utils import free_port
 
 from .chromedriver_manager import ChromedriverManager
 from .os_utils import OSUtils
+from .wait_strategy import WaitStrategy, FixedDelay
+from .dom_snapshot import DomSnapshot
+from .shared_service import SharedService
+from .metrics import Metrics
+from .cdp import CDPConnection
+from .response_cache import ResponseCache
+from .download_manager import DownloadManager
+from .element_cache import ElementCache
+from .process_registry import ProcessRegistry
 
 class Chromedriver:
     """
@@ -21,10 +36,105 @@ class Chromedriver:
                         'chromedriver',
                         'chrome.exe',
                         'chromedriver.exe']
+    TEXT = 'text'   # pseudo attribute used by extract to read the element text
+    SCRIPT_ACTIONS = """
+        const actions = arguments[0];
+        const stopOnError = arguments[1];
+        const find = xpath => document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        const fire = (element, type) => element.dispatchEvent(new Event(type, {bubbles: true}));
+        const setValue = (element, value) => {
+            // the prototype setter keeps frameworks tracking the value (React, Vue) in sync
+            const prototype = Object.getPrototypeOf(element);
+            const descriptor = Object.getOwnPropertyDescriptor(prototype, 'value');
+            if (descriptor && descriptor.set) descriptor.set.call(element, value); else element.value = value;
+            fire(element, 'input');
+            fire(element, 'change');
+        };
+        const results = [];
+        for (const action of actions) {
+            try {
+                const element = find(action.xpath);
+                if (!element) throw new Error('element not found');
+                if (element.focus) element.focus();
+                if (action.action === 'set_value') {
+                    setValue(element, action.value);
+                } else if (action.action === 'select') {
+                    if (element.tagName === 'SELECT') {
+                        const option = Array.from(element.options).find(o => o.value === action.value || o.text.trim() === action.value);
+                        if (!option) throw new Error('option not found');
+                        element.value = option.value;
+                        fire(element, 'input');
+                        fire(element, 'change');
+                    } else {
+                        setValue(element, action.value);
+                    }
+                } else if (action.action === 'click') {
+                    element.click();
+                } else {
+                    throw new Error('unknown action ' + action.action);
+                }
+                if (action.action !== 'click' && element.blur) element.blur();
+                results.push({ok: true, error: null});
+            } catch (e) {
+                results.push({ok: false, error: String(e.message || e)});
+                if (stopOnError) break;
+            }
+        }
+        return results;
+    """
+    ACTIONS = ('set_value', 'select', 'click', 'press_key')
+    PROFILE_LOCK_FILES = ['SingletonLock', 'SingletonSocket', 'SingletonCookie', 'lockfile']
+    RESOURCE_PATTERNS = {
+        'image': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp', '*.avif'],
+        'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+        'media': ['*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav', '*.m4a', '*.avi', '*.mov'],
+        'stylesheet': ['*.css'],
+    }
+    SCRIPT_EXTRACT = """
+        const fields = arguments[0];
+        const rowsXpath = arguments[1];
+        const read = (node, attribute) => {
+            if (attribute === 'text') {
+                if (node.innerText === undefined) return (node.textContent || '').trim();
+                const box = node.closest('select') || node;
+                return box.getClientRects().length > 0 ? node.innerText.trim() : '';
+            }
+            let value = node[attribute];
+            if (value === undefined || (value !== null && typeof value === 'object')) {
+                value = node.getAttribute ? node.getAttribute(attribute) : null;
+            }
+            if (typeof value === 'boolean') return value ? 'true' : null;
+            return value === null || value === undefined ? null : String(value);
+        };
+        const evaluate = (xpath, context) => {
+            const result = document.evaluate(xpath, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            const nodes = [];
+            for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+            return nodes;
+        };
+        const columns = {};
+        if (rowsXpath === null) {
+            for (const [name, [xpath, attribute]] of Object.entries(fields)) {
+                columns[name] = evaluate(xpath, document).map(node => read(node, attribute));
+            }
+        } else {
+            const rows = evaluate(rowsXpath, document);
+            for (const [name, [xpath, attribute]] of Object.entries(fields)) {
+                columns[name] = rows.map(row => {
+                    const nodes = evaluate(xpath, row);
+                    return nodes.length > 0 ? read(nodes[0], attribute) : null;
+                });
+            }
+        }
+        return columns;
+    """
 
-    def __init__(self, path_chromedriver:str=None, headless:bool=False, kill_chrome:bool=True, download:bool=False, path_downloads:str=None, chrome_arguments:list=None):
+    def __init__(self, path_chromedriver:str=None, headless:bool=False, kill_chrome:bool=True, download:bool=False, path_downloads:str=None, chrome_arguments:list=None, wait_strategy:WaitStrategy=None, shared_service:bool=False, page_load_strategy:str=None, metrics:Metrics=None, block_resources:list[str]=None, blocked_urls:list[str]=None, response_cache:ResponseCache=None, recycle_rss:int=None, recycle_navigations:int=None, recycle_age:float=None, on_recycle=None, profile_template:str=None, path_profiles:str=None, persistent:bool=False, path_state:str=None, isolate_downloads:bool=False, on_download_progress=None, cache_elements:bool=False, count_resources:bool=False):
         """
-        class constructor
+        class constructor.
+        Resource blocking ('block_resources' and 'blocked_urls') is URL based: the classes of RESOURCE_PATTERNS match file extensions,
+        so resources served without one (images from an endpoint, fonts behind a query-only url) load anyway. The patterns are set
+        through Network.setBlockedURLs on the window open at startup only; tabs opened later, including the TabPool ones, are not blocked
         """
         self.path_chromedriver = os.path.abspath(path_chromedriver) if path_chromedriver is not None else None
         self.headless = headless
@@ -32,33 +142,298 @@ class Chromedriver:
         self.download = download
         self.path_downloads = os.path.abspath(path_downloads) if path_downloads is not None else OSUtils.get_root_directory_path()
         self.chrome_arguments = list() if chrome_arguments is None else chrome_arguments
+        self.wait_strategy = WaitStrategy.default() if wait_strategy is None else wait_strategy
+        self.wait_time = 0.0    # total seconds spent waiting after interactions
+        self.dom_snapshot = None
+        self.shared_service = shared_service    # attaches the session to the process wide chromedriver server
+        self.page_load_strategy = page_load_strategy    # 'normal' (selenium default), 'eager' or 'none'
+        self.metrics = metrics  # opt-in timings of methods, WebDriver commands, waits and startup
+        self.block_resources = list() if block_resources is None else block_resources   # keys of RESOURCE_PATTERNS
+        self.blocked_urls = list() if blocked_urls is None else blocked_urls    # url patterns, '*' is a wildcard
+        self.count_resources = count_resources  # collects the performance log to count the allowed and blocked requests
+        self.resource_counts = {'allowed': 0, 'blocked': 0}     # requests of the current page when counting
+        self.resource_counts_history = list()   # (url, counts) of the previous pages when counting
+        self.__page_url = None
+        self.response_cache = response_cache    # record/replay of the http responses through devtools interception
+        self.recycle_rss = recycle_rss  # bytes of the browser process tree that trigger a transparent restart
+        self.recycle_navigations = recycle_navigations
+        self.recycle_age = recycle_age  # seconds
+        self.on_recycle = on_recycle    # callback receiving a dict describing each recycle
+        self.recycle_count = 0
+        self.profile_template = os.path.abspath(profile_template) if profile_template is not None else None
+        self.path_profiles = os.path.abspath(path_profiles) if path_profiles is not None else OSUtils.get_tmpfs_directory_path()  # parent of the clones, tmpfs unless set next to the template for reflinks
+        self.path_profile = None    # per session clone of the profile template
+        self.persistent = persistent    # leaves the browser running after the script and reattaches to it on the next run
+        self.path_state = os.path.abspath(path_state) if path_state is not None else os.path.join(OSUtils.get_root_directory_path(), ".chromedriver_state.json")
+        # download mode tracks the downloads through devtools events, optionally in a directory of its own
+        self.download_manager = DownloadManager(self.path_downloads, isolate_downloads, on_download_progress) if download else None
+        self.element_cache = ElementCache(cache_elements)   # opt-in handles of the current page, dropped after every interaction
+        self.process_group = None   # process group of this session chromedriver and chrome, killed at once on teardown
+        self.visited_origins = set()    # origins whose storage is cleared by reset
+        self.storage_restore_script = None  # identifier of the local storage restore script left by a recycle
+
+        self.__launch()
 
-        self.__start_driver()                
+    def __launch(self):
+        """
+        Starts the driver and resets the recycling counters
+        """
+        start = perf_counter()
+        self.__start_driver()
+        if self.metrics is not None:
+            self.metrics.observe("startup.start_driver", perf_counter() - start)
+            self.metrics.instrument_driver(self.driver)
+        self.navigations = 0
+        self.started_at = monotonic()
 
     def __del__(self):
         """
         Class destructor
         """
-        if self.kill_chrome:
+        self.close()
+
+    @Metrics.timed
+    def close(self):
+        """
+        Closes the browser session and, when kill_chrome is set, kills the chrome processes left behind.
+        In persistent mode only chromedriver is stopped and the browser is left running for the next run
+        """
+        if self.download_manager is not None:
+            self.download_manager.detach()
+        if self.persistent:
+            if self.response_cache is not None and hasattr(self, 'driver'):
+                self.response_cache.detach(self.driver.session_id)
+            if hasattr(self, 'driver'):
+                try:
+                    self.driver.service.stop()
+                except Exception:
+                    pass
+                del self.driver
+            return
+        if not self.shared_service and self.kill_chrome and self.process_group is None and hasattr(self, 'driver'):
+            # without a process group of its own (windows) the chrome processes are found walking the process children
             Chromedriver.kill_chrome_children()
+        self.__quit_driver(kill_browser=self.kill_chrome)
+
+    def __quit_driver(self, kill_browser:bool):
+        """
+        Quits the session and optionally kills what is left of this session processes: its process group or,
+        with a shared chromedriver server whose group must survive, its browser process tree
+        """
+        if self.response_cache is not None and hasattr(self, 'driver'):
+            self.response_cache.detach(self.driver.session_id)
+        if hasattr(self, 'driver'):
+            browser_pid = self.get_browser_pid() if kill_browser and self.shared_service else None
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            del self.driver
+            if self.process_group is not None:
+                if kill_browser:
+                    ProcessRegistry.kill_group(self.process_group)
+                else:
+                    ProcessRegistry.unregister(self.process_group)
+                self.process_group = None
+            if browser_pid is not None:
+                try:
+                    browser = psutil.Process(browser_pid)
+                    for child in browser.children(recursive=True):
+                        child.kill()
+                    browser.kill()
+                except psutil.Error:
+                    pass
+        if self.path_profile is not None:
+            shutil.rmtree(self.path_profile, ignore_errors=True)
+            self.path_profile = None
+
+    def load_persistent_state(self) -> dict:
+        """
+        Returns the state of the browser left running by a previous persistent run, or None when there is none or it is dead
+        """
+        try:
+            with open(self.path_state, 'r') as file:
+                state = json.load(file)
+            if not psutil.pid_exists(state['browser_pid']):
+                return None
+            with urllib.request.urlopen(f"http://{state['debugger_address']}/json/version", timeout=2):
+                pass
+            return state
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_persistent_state(self):
+        """
+        Records the debugger address and the process ids of the running browser in the state file
+        """
+        state = {
+            'debugger_address': self.driver.capabilities['goog:chromeOptions']['debuggerAddress'],
+            'browser_pid': self.get_browser_pid(),
+            'chromedriver_pid': self.driver.service.process.pid,
+            'path_profile': self.path_profile,
+        }
+        if state['browser_pid'] is None:
+            # attached sessions do not own the browser process, the previous state knows it
+            previous = self.load_persistent_state() or dict()
+            state['browser_pid'] = previous.get('browser_pid')
+            state['path_profile'] = previous.get('path_profile')
+        with open(self.path_state, 'w') as file:
+            json.dump(state, file)
+
+    def quit_persistent(self):
+        """
+        Terminates the browser kept running by the persistent mode and removes its state file
+        """
+        state = self.load_persistent_state()
         if hasattr(self, 'driver'):
-            self.driver.quit()                        
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            del self.driver
+        if state is not None:
+            try:
+                browser = psutil.Process(state['browser_pid'])
+                for child in browser.children(recursive=True):
+                    child.kill()
+                browser.kill()
+            except psutil.Error:
+                pass
+            if state.get('path_profile'):
+                shutil.rmtree(state['path_profile'], ignore_errors=True)
+        if os.path.exists(self.path_state):
+            os.remove(self.path_state)
+
+    def clone_profile_template(self) -> str:
+        """
+        Clones the profile template into a new user data directory under path_profiles and returns its path.
+        By default the clones live in memory (/dev/shm, or the temp dir without it) and the files are copied.
+        Setting path_profiles on the btrfs/xfs filesystem of the template reflinks the files instead
+        """
+        os.makedirs(self.path_profiles, exist_ok=True)
+        path_profile = tempfile.mkdtemp(prefix="chrome-profile-", dir=self.path_profiles)
+        os.rmdir(path_profile)
+        OSUtils.clone_directory(self.profile_template, path_profile, ignore=Chromedriver.PROFILE_LOCK_FILES)
+        return path_profile
     
     @staticmethod
     def kill_chrome_children(pid:int=None):
         """
-        Kills chromedriver process children
+        Kills chromedriver process children. The shared chromedriver servers and their browsers are left alone
         """
         process = psutil.Process() if pid is None else psutil.Process(pid)
+        protected = set()
+        for service_pid in SharedService.get_pids():
+            try:
+                protected.add(service_pid)
+                protected.update(child.pid for child in psutil.Process(service_pid).children(recursive=True))
+            except psutil.Error:
+                pass
         for child in process.children(recursive=True):
-            if child.name() in Chromedriver.CHROME_PROCESSES:
+            if child.pid not in protected and child.name() in Chromedriver.CHROME_PROCESSES:
                 child.kill()                      
     
+    def get_browser_rss(self) -> int:
+        """
+        Returns the resident memory in bytes of this session browser process tree, or None when the browser can not be found
+        """
+        browser_pid = self.get_browser_pid()
+        if browser_pid is None:
+            return None
+        try:
+            browser = psutil.Process(browser_pid)
+            rss = browser.memory_info().rss
+            for child in browser.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return rss
+        except psutil.Error:
+            return None
+
+    def get_recycle_reason(self) -> str:
+        """
+        Returns why the browser should be recycled according to the configured thresholds, or None
+        """
+        if self.recycle_navigations is not None and self.navigations >= self.recycle_navigations:
+            return "navigations"
+        if self.recycle_age is not None and monotonic() - self.started_at >= self.recycle_age:
+            return "age"
+        if self.recycle_rss is not None:
+            rss = self.get_browser_rss()
+            if rss is not None and rss >= self.recycle_rss:
+                return "rss"
+        return None
+
+    @Metrics.timed
+    def recycle(self, reason:str="manual", restore_url:bool=True):
+        """
+        Restarts the browser carrying over the cookies, the local storage of the current origin and, with restore_url, the current url.
+        Without restore_url the local storage is restored by the next get on the same origin
+        """
+        event = {'reason': reason, 'navigations': self.navigations, 'age': monotonic() - self.started_at, 'rss': self.get_browser_rss()}
+        url = self.driver.current_url
+        cookies = self.send_command('Network.getAllCookies').get('cookies', list())
+        try:
+            local_storage = self.driver.execute_script("return [window.location.origin, Object.assign({}, window.localStorage)];")
+        except WebDriverException:
+            local_storage = None
+
+        self.invalidate_snapshot()
+        self.element_cache.clear()
+        self.__quit_driver(kill_browser=True)
+        self.__launch()
+        self.storage_restore_script = None
+
+        cookie_fields = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+        cookies = [{k: v for k, v in c.items() if k in cookie_fields and not (k == 'expires' and c.get('session'))} for c in cookies]
+        if cookies:
+            self.send_command('Network.setCookies', {'cookies': cookies})
+        if url.startswith('http'):
+            if local_storage is not None and local_storage[1]:
+                # restores the storage before the page scripts run
+                source = ("if (window.location.origin === %s) { const items = %s; for (const k in items) window.localStorage.setItem(k, items[k]); }"
+                          % (json.dumps(local_storage[0]), json.dumps(local_storage[1])))
+                self.storage_restore_script = self.send_command('Page.addScriptToEvaluateOnNewDocument', {'source': source}).get('identifier')
+            if restore_url:
+                self.driver.get(url)
+                self.__remove_storage_restore()
+        self.recycle_count += 1
+        event['url'] = url
+        print(f"Browser recycled ({reason}).")
+        if self.on_recycle is not None:
+            self.on_recycle(event)
+
+    def __remove_storage_restore(self):
+        """
+        Removes the local storage restore script registered by recycle once a page loaded with it
+        """
+        if self.storage_restore_script is not None:
+            self.send_command('Page.removeScriptToEvaluateOnNewDocument', {'identifier': self.storage_restore_script})
+            self.storage_restore_script = None
+
+    def get_browser_pid(self) -> int:
+        """
+        Returns the process id of this session chrome browser, or None when it can not be found
+        """
+        try:
+            user_data_dir = self.driver.capabilities.get('chrome', dict()).get('userDataDir')
+            service_pid = self.driver.service.process.pid
+            for child in psutil.Process(service_pid).children():
+                if child.name() in Chromedriver.CHROME_PROCESSES and f"--user-data-dir={user_data_dir}" in child.cmdline():
+                    return child.pid
+        except (psutil.Error, AttributeError):
+            pass
+        return None
+
     def __start_driver(self):
         """
         Starts the driver
         """
+        attach_state = self.load_persistent_state() if self.persistent else None
         chrome_options = ChromeOptions()               
+        chrome_prefs = dict()
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-gpu')            
         chrome_options.add_argument('--disable-extensions')
@@ -81,168 +456,552 @@ class Chromedriver:
         for argument in self.chrome_arguments:
             chrome_options.add_argument(argument)
 
+        if self.profile_template is not None and attach_state is None:
+            if self.path_profile is None:
+                self.path_profile = self.clone_profile_template()
+            chrome_options.add_argument(f'--user-data-dir={self.path_profile}')
+
         if self.headless:
             chrome_options.add_argument('--headless')
             chrome_options.add_argument('--window-size=1920,1080')
         else:            
             chrome_options.add_argument('--start-maximized')
 
+        if self.page_load_strategy is not None:
+            chrome_options.page_load_strategy = self.page_load_strategy
+
+        if self.is_lean():
+            for resource in self.block_resources:
+                if resource not in Chromedriver.RESOURCE_PATTERNS:
+                    raise Exception(f"Resource class '{resource}' not known, use one of {list(Chromedriver.RESOURCE_PATTERNS)}.")
+        if self.count_resources:
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
         if self.download:
             if self.path_chromedriver is None:
                 prefs = {
                     "plugins.plugins_list": [{"enabled": False, "name": "Chrome PDF Viewer"}], # Disable Chrome's PDF Viewer                
                     "download.extensions_to_open": "applications/pdf",                       
-                    "download.default_directory": self.path_downloads,
+                    "download.default_directory": self.download_manager.path_downloads,
                 }
             else:
                 prefs = {
                     "download.prompt_for_download": False,
                     "plugins.always_open_pdf_externally": True,
-                    "download.default_directory": self.path_downloads
-                }
-            chrome_options.add_experimental_option('prefs', prefs)
-            self.driver.set_page_load_timeout(60*3)
-            if self.headless:
-                self.driver.command_executor._commands["send_command"] = ("POST", '/session/$sessionId/chromium/send_command')
-                params = {
-                    'cmd':'Page.setDownloadBehavior',
-                    'params': {
-                        'behavior': 'allow',
-                        'downloadPath': self.path_downloads
-                    }
+                    "download.default_directory": self.download_manager.path_downloads
                 }
-                self.driver.execute("send_command", params)        
+            chrome_prefs.update(prefs)
+
+        if chrome_prefs:
+            chrome_options.add_experimental_option('prefs', chrome_prefs)
+
+        if attach_state is not None:
+            # the launch arguments and preferences belong to the running browser, attaching only takes its address
+            print(f"Attaching to the running browser at {attach_state['debugger_address']}.")
+            chrome_options = ChromeOptions()
+            chrome_options.debugger_address = attach_state['debugger_address']
+            if self.page_load_strategy is not None:
+                chrome_options.page_load_strategy = self.page_load_strategy
+        elif self.persistent:
+            chrome_options.add_argument(f'--remote-debugging-port={free_port()}')
+            chrome_options.add_experimental_option('detach', True)
     
         try:
-            if self.path_chromedriver is None:
-                self.driver = Chrome(options=chrome_options)
+            if self.shared_service:
+                self.driver = Chrome(service=SharedService.get(self.path_chromedriver),
+                                     options=chrome_options)
+            elif self.path_chromedriver is None:
+                chrome_service = Service(popen_kw=ProcessRegistry.get_popen_kw())
+                self.driver = Chrome(service=chrome_service,
+                                     options=chrome_options)
             else:
-                chrome_service = Service(executable_path=self.path_chromedriver)
+                chrome_service = Service(executable_path=self.path_chromedriver,
+                                         popen_kw=ProcessRegistry.get_popen_kw())
                 self.driver = Chrome(service=chrome_service,
                                      options=chrome_options)
         except WebDriverException:
+            if attach_state is not None:
+                print("Could not attach to the running browser, launching a new one.")
+                os.remove(self.path_state)
+                self.__start_driver()
+                return
+            start = perf_counter()
             self.path_chromedriver = ChromedriverManager.manage_chromedriver(self.path_chromedriver)
+            if self.metrics is not None:
+                self.metrics.observe("startup.manage_chromedriver", perf_counter() - start)
             self.__start_driver()
+            return
+
+        if self.persistent:
+            self.save_persistent_state()
+        elif not self.shared_service and ProcessRegistry.supports_process_groups():
+            self.process_group = self.driver.service.process.pid
+            if ProcessRegistry.register(self.process_group):
+                ProcessRegistry.start_reaper()
+        if self.download:
+            self.driver.set_page_load_timeout(60*3)
+            # Browser.setDownloadBehavior applies to headless mode too and reports the download events
+            self.download_manager.attach(self.open_cdp(browser=True))
+        if self.is_lean():
+            self.send_command('Network.enable')
+            self.send_command('Network.setBlockedURLs', {'urls': self.get_blocked_url_patterns()})
+        if self.response_cache is not None:
+            self.response_cache.attach(self.open_cdp(), self.driver.session_id)
+
+    @Metrics.timed
+    def wait_for_downloads(self, timeout:float=None, expected:int=None) -> list[dict]:
+        """
+        Waits for the downloads in progress (and at least 'expected' new ones) and returns the ones finished since the last call,
+        each a dict with 'path', 'received_bytes', 'total_bytes', 'url' and 'state'
+        """
+        if self.download_manager is None:
+            raise Exception("Downloads are only tracked when the Chromedriver is created with download=True.")
+        return self.download_manager.wait_for_downloads(timeout, expected)
+
+    def open_cdp(self, browser:bool=False) -> CDPConnection:
+        """
+        Opens a devtools websocket connection to the current window, or to the browser target, able to receive events
+        """
+        debugger_address = self.driver.capabilities['goog:chromeOptions']['debuggerAddress']
+        if browser:
+            return CDPConnection(CDPConnection.get_browser_ws_url(debugger_address))
+        return CDPConnection(CDPConnection.get_page_ws_url(debugger_address, self.driver.current_window_handle))
+
+    def send_command(self, cmd:str, params:dict=None) -> dict:
+        """
+        Sends a devtools protocol command to the current window through chromedriver and returns its result
+        """
+        # goog/cdp/execute answers the command result, chromium/send_command drops it
+        return self.driver.execute_cdp_cmd(cmd, dict() if params is None else params) or dict()
+
+    def is_lean(self) -> bool:
+        """
+        Verifies if the lean page-load mode (resource blocking) is enabled
+        """
+        return len(self.block_resources) > 0 or len(self.blocked_urls) > 0
+
+    def get_blocked_url_patterns(self) -> list[str]:
+        """
+        Returns the url patterns blocked in lean mode, resource classes matched by file extension
+        """
+        patterns = list()
+        for resource in self.block_resources:
+            for pattern in Chromedriver.RESOURCE_PATTERNS[resource]:
+                patterns.extend([pattern, pattern + '?*'])
+        return patterns + self.blocked_urls
+
+    @Metrics.timed
+    def get_resource_counts(self) -> dict:
+        """
+        Returns the allowed and blocked request counts of the current page, read from the performance log.
+        Every resource class, images included, is blocked through Network.setBlockedURLs so the blocked requests are counted
+        """
+        if not self.count_resources:
+            raise Exception("Resource counts are only collected when the Chromedriver is created with count_resources=True.")
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            if message['method'] == 'Network.requestWillBeSent':
+                self.resource_counts['allowed'] += 1
+            elif message['method'] == 'Network.loadingFailed' and message['params'].get('blockedReason') == 'inspector':
+                self.resource_counts['allowed'] -= 1
+                self.resource_counts['blocked'] += 1
+        return dict(self.resource_counts)
+
+    def __start_page_counts(self, url:str):
+        """
+        Closes the request counts of the previous page and starts the ones of a new page
+        """
+        if not self.count_resources:
+            return
+        counts = self.get_resource_counts()
+        if self.__page_url is not None:
+            self.resource_counts_history.append((self.__page_url, counts))
+        self.resource_counts = {'allowed': 0, 'blocked': 0}
+        self.__page_url = url
         
     #####################################################################################################################################
     ##
 
+    @Metrics.timed
     def get(self, url:str):
         """
         Access a given url
         """
+        reason = self.get_recycle_reason()
+        if reason is not None:
+            # the requested url replaces the restore of the previous one
+            self.recycle(reason, restore_url=False)
+        self.invalidate_snapshot()
+        self.element_cache.clear()
+        self.__start_page_counts(url)
+        self.__add_visited_origin(url)
         self.driver.get(url)
+        self.__add_current_origin()    # the page may have been redirected to another origin
+        self.navigations += 1
+        self.__remove_storage_restore()
     
+    @Metrics.timed
     def refresh(self):
         """
         Refreshes the page
         """
+        self.invalidate_snapshot()
+        self.element_cache.clear()
+        self.__start_page_counts(self.__page_url)
         self.driver.refresh()
+
+    @Metrics.timed
+    def snapshot(self) -> DomSnapshot:
+        """
+        Captures the page source once so the following read-only queries run locally until the next get, refresh, interaction or window switch
+        """
+        self.dom_snapshot = DomSnapshot(self.driver.page_source, self.driver.current_url)
+        return self.dom_snapshot
+
+    def invalidate_snapshot(self):
+        """
+        Discards the page snapshot, the read-only queries go back to the live browser
+        """
+        self.dom_snapshot = None
     
-    def click(self, xpath:str):
+    def get_wait_strategy(self, wait:WaitStrategy|float=None) -> WaitStrategy:
+        """
+        Returns the strategy of a wait override: None is the session strategy and a number a fixed delay
+        """
+        if wait is None:
+            return self.wait_strategy
+        if isinstance(wait, WaitStrategy):
+            return wait
+        return FixedDelay(wait)
+
+    def prepare_wait(self, wait:WaitStrategy|float=None, xpath:str=None):
+        """
+        Lets the wait strategy observe the interaction about to run on a given element (e.g. the requests counted by NetworkIdle)
+        """
+        self.get_wait_strategy(wait).prepare(self.driver, xpath)
+
+    def wait(self, xpath:str=None, delay:float=0, wait:WaitStrategy|float=None):
+        """
+        Waits for the page to be ready using the session wait strategy or the given override. A number overrides it with a fixed delay
+        """
+        strategy = self.get_wait_strategy(wait)
+        if isinstance(strategy, FixedDelay) and strategy.seconds == 0:
+            return
+        start = monotonic()
+        try:
+            strategy.wait(self.driver, xpath, delay)
+        finally:
+            elapsed = monotonic() - start
+            self.wait_time += elapsed
+            if self.metrics is not None:
+                self.metrics.observe("wait." + type(strategy).__name__, elapsed)
+
+    @staticmethod
+    def next_step(steps) -> tuple:
+        """
+        Runs the next blocking step of an interaction generator, returns (False, (xpath, delay)) for the wait that follows it
+        or (True, result) once the interaction finished
+        """
+        try:
+            return False, next(steps)
+        except StopIteration as e:
+            return True, e.value
+
+    def run_steps(self, steps, wait:WaitStrategy|float=None):
+        """
+        Runs an interaction generator (the *_steps methods) waiting at every (xpath, delay) it yields, returns its result.
+        The generators hold the interaction logic, so AsyncChromedriver runs the same steps and awaits the waits instead
+        """
+        while True:
+            done, value = Chromedriver.next_step(steps)
+            if done:
+                return value
+            self.wait(*value, wait)
+
+    @Metrics.timed
+    def click(self, xpath:str, wait:WaitStrategy|float=None):
         """
         Clicks in a given element
         """
-        WebDriverWait(self.driver, Chromedriver.TIMEOUT).until(EC.presence_of_element_located((By.XPATH, xpath)))
-        self.driver.find_element(By.XPATH, value=xpath).click()
-        sleep(.25)
+        self.run_steps(self.click_steps(xpath, wait), wait)
+
+    def click_steps(self, xpath:str, wait:WaitStrategy|float=None):
+        """
+        Steps of click, see run_steps
+        """
+        self.prepare_wait(wait, xpath)
+        self.invalidate_snapshot()
+        self.on_element(xpath, lambda element: element.click())
+        self.element_cache.clear()
+        yield xpath, .25
+        self.__add_current_origin()
+
+    def find_element(self, xpath:str, wait_presence:bool=True):
+        """
+        Returns the element of a given xpath from the element cache, locating it (after waiting for its presence) on a miss
+        """
+        element = self.element_cache.get(xpath)
+        if element is None:
+            if wait_presence:
+                element = WebDriverWait(self.driver, Chromedriver.TIMEOUT).until(EC.presence_of_element_located((By.XPATH, xpath)))
+            else:
+                element = self.driver.find_element(By.XPATH, value=xpath)
+            self.element_cache.put(xpath, element)
+        return element
+
+    def on_element(self, xpath:str, fn, wait_presence:bool=True):
+        """
+        Returns fn(element) for the element of a given xpath, locating it again once when the cached handle is stale
+        """
+        try:
+            return fn(self.find_element(xpath, wait_presence))
+        except StaleElementReferenceException:
+            self.element_cache.discard(xpath)
+            return fn(self.find_element(xpath, wait_presence))
 
+    @Metrics.timed
     def click_index(self, xpath:str, index=int):
         """
         Clicks in a specific element given index. Helps when there are a lot of similar xpaths for an element
         """
+        self.invalidate_snapshot()
         elements = self.driver.find_elements(By.XPATH, value=xpath)
         elements[index].click()
+        self.element_cache.clear()
+        self.__add_current_origin()
     
-    def escape(self):
+    @Metrics.timed
+    def escape(self, wait:WaitStrategy|float=None):
         """
         Presses ESC
         """
-        sleep(.5)
+        self.run_steps(self.escape_steps(wait), wait)
+
+    def escape_steps(self, wait:WaitStrategy|float=None):
+        """
+        Steps of escape, see run_steps
+        """
+        self.prepare_wait(wait)
+        self.invalidate_snapshot()
+        yield None, .5
         ActionChains(self.driver).send_keys(Keys.ESCAPE).perform()       
+        self.element_cache.clear()
 
-    def press_tab(self, xpath:str):
+    @Metrics.timed
+    def press_tab(self, xpath:str, wait:WaitStrategy|float=None):
         """
         Presses TAB
         """
-        self.send_keys(xpath=xpath, keys=Keys.TAB)
+        self.send_keys(xpath=xpath, keys=Keys.TAB, wait=wait)
 
-    def send_keys(self, xpath:str, keys:str):
+    @Metrics.timed
+    def send_keys(self, xpath:str, keys:str, wait:WaitStrategy|float=None):
         """
         Sends the given string to an element
         """
-        WebDriverWait(self.driver, Chromedriver.TIMEOUT).until(EC.presence_of_element_located((By.XPATH, xpath)))
-        self.driver.find_element(By.XPATH, value=xpath).clear()
-        self.driver.find_element(By.XPATH, value=xpath).send_keys(Keys.HOME+keys)
-        sleep(.25)    
+        self.run_steps(self.send_keys_steps(xpath, keys, wait), wait)
+
+    def send_keys_steps(self, xpath:str, keys:str, wait:WaitStrategy|float=None):
+        """
+        Steps of send_keys, see run_steps
+        """
+        self.prepare_wait(wait, xpath)
+        self.invalidate_snapshot()
+        self.on_element(xpath, lambda element: element.clear())
+        self.on_element(xpath, lambda element: element.send_keys(Keys.HOME+keys))
+        self.element_cache.clear()
+        yield xpath, .25
     
-    def drop_down(self, xpath:str, keys:str):
+    @Metrics.timed
+    def press_key(self, xpath:str, key:str, wait:WaitStrategy|float=None):
+        """
+        Presses a key on a given element without clearing it. The key is a character or a Keys name such as 'enter'
+        """
+        self.run_steps(self.press_key_steps(xpath, key, wait), wait)
+
+    def press_key_steps(self, xpath:str, key:str, wait:WaitStrategy|float=None):
+        """
+        Steps of press_key, see run_steps
+        """
+        self.prepare_wait(wait, xpath)
+        self.invalidate_snapshot()
+        self.on_element(xpath, lambda element: element.send_keys(Chromedriver.get_key(key)))
+        self.element_cache.clear()
+        yield xpath, .25
+        self.__add_current_origin()    # Enter may submit a form to another origin
+
+    @staticmethod
+    def get_key(key:str) -> str:
+        """
+        Returns the keystroke of a Keys name ('enter', 'arrow_down', ...), other strings are sent as they are
+        """
+        key = str(key)
+        return getattr(Keys, key.upper(), key) if len(key) > 1 else key
+
+    @Metrics.timed
+    def drop_down(self, xpath:str, keys:str, wait:WaitStrategy|float=None):
         """
         Selects a given string from a dropdown element
         """
-        WebDriverWait(self.driver, Chromedriver.TIMEOUT).until(EC.presence_of_element_located((By.XPATH, xpath)))
-        self.driver.find_element(By.XPATH, value=xpath).click()
-        sleep(.1)
-        self.driver.find_element(By.XPATH, value=xpath).send_keys(keys+Keys.ESCAPE)
-        sleep(.75)
+        self.run_steps(self.drop_down_steps(xpath, keys, wait), wait)
+
+    def drop_down_steps(self, xpath:str, keys:str, wait:WaitStrategy|float=None):
+        """
+        Steps of drop_down, see run_steps
+        """
+        self.prepare_wait(wait, xpath)
+        self.invalidate_snapshot()
+        self.on_element(xpath, lambda element: element.click())
+        yield xpath, .1
+        self.on_element(xpath, lambda element: element.send_keys(keys+Keys.ESCAPE))
+        self.element_cache.clear()
+        yield xpath, .75
     
+    @Metrics.timed
+    def run_actions(self, actions:list[dict], stop_on_error:bool=True, wait:WaitStrategy|float=None) -> list[dict]:
+        """
+        Runs a list of form actions in the browser with a single round trip, dispatching the input/change events.
+        Each action is a dict {'action': 'set_value'|'select'|'click'|'press_key', 'xpath': ..., 'value': ...}, with
+        'real_keys': True for fields that need real keystrokes, which run through the per-step WebDriver methods instead.
+        The press_key actions always do, synthetic key events are untrusted and skip the default actions (Enter submitting, Tab moving focus).
+        Returns a {'ok': bool, 'error': str} per action, the actions after a failure are skipped when stop_on_error is set
+        """
+        return self.run_steps(self.run_actions_steps(actions, stop_on_error, wait), wait)
+
+    def run_actions_steps(self, actions:list[dict], stop_on_error:bool=True, wait:WaitStrategy|float=None):
+        """
+        Steps of run_actions, see run_steps
+        """
+        for action in actions:
+            if action.get('action') not in Chromedriver.ACTIONS:
+                raise Exception(f"Action '{action.get('action')}' not known, use one of {Chromedriver.ACTIONS}.")
+        self.prepare_wait(wait)
+        self.invalidate_snapshot()
+        results = list()
+        batch = list()
+        for action in actions + [None]:
+            if action is not None and not action.get('real_keys') and action['action'] != 'press_key':
+                batch.append({'action': action['action'], 'xpath': action['xpath'], 'value': action.get('value')})
+                continue
+            if batch:
+                results.extend(self.driver.execute_script(Chromedriver.SCRIPT_ACTIONS, batch, stop_on_error))
+                self.element_cache.clear()
+                batch = list()
+            if stop_on_error and any(not result['ok'] for result in results):
+                break
+            if action is not None:
+                results.append((yield from self.__action_steps(action, wait)))
+        if stop_on_error:
+            results.extend({'ok': False, 'error': 'skipped'} for _ in range(len(actions) - len(results)))
+        yield None, 0
+        self.__add_current_origin()
+        return results
+
+    def __action_steps(self, action:dict, wait:WaitStrategy|float=None):
+        """
+        Runs a single action through the per-step WebDriver interactions and returns its result
+        """
+        try:
+            if action['action'] == 'set_value':
+                yield from self.send_keys_steps(action['xpath'], action['value'], wait)
+            elif action['action'] == 'select':
+                yield from self.drop_down_steps(action['xpath'], action['value'], wait)
+            elif action['action'] == 'click':
+                yield from self.click_steps(action['xpath'], wait)
+            else:
+                yield from self.press_key_steps(action['xpath'], action['value'], wait)
+            return {'ok': True, 'error': None}
+        except WebDriverException as e:
+            return {'ok': False, 'error': e.msg or type(e).__name__}
+
+    @Metrics.timed
     def get_element_attribute(self, xpath:str, attribute:str) -> str:
         """
         Returns the given attribute of a given element xpath
         """
-        WebDriverWait(self.driver, Chromedriver.TIMEOUT).until(EC.presence_of_element_located((By.XPATH, xpath)))
-        element = self.driver.find_element(By.XPATH, value=xpath)
-        return element.get_attribute(attribute)
+        if self.dom_snapshot is not None:
+            return self.dom_snapshot.attribute(xpath, attribute)
+        return self.on_element(xpath, lambda element: element.get_attribute(attribute))
 
+    @Metrics.timed
     def get_elements_attribute(self, xpath:str, attribute:str) -> list:
         """
         Return a list of a given attribute for a given element xpath
         """
+        if self.dom_snapshot is not None:
+            return self.dom_snapshot.attributes(xpath, attribute)
         WebDriverWait(self.driver, Chromedriver.TIMEOUT).until(EC.presence_of_element_located((By.XPATH, xpath)))
-        elements = self.driver.find_elements(By.XPATH, value=xpath)
-        if len(elements) > 0:
-            return [e.get_attribute(attribute) for e in elements]
-        return []
+        return self.extract({attribute: (xpath, attribute)}, columnar=True)[attribute]
     
+    @Metrics.timed
     def check_attribute_exists(self, xpath:str, attribute:str) -> bool:
         element = self.get_element_attribute(xpath, attribute)
         return True if element else False
 
+    @Metrics.timed
     def check_element_exists(self, xpath:str) -> bool:
         """
         Verifies if a given element xpath exists
         """
+        if self.dom_snapshot is not None:
+            return self.dom_snapshot.exists(xpath)
         elements = self.driver.find_elements(By.XPATH, value=xpath)
         if len(elements) > 0:
             return True
         return False
 
+    @Metrics.timed
     def get_elements(self, xpath:str) -> list:
         """
         Returns the list of elements found for a given xpath
         """
         return self.driver.find_elements(By.XPATH, value=xpath)
 
+    @Metrics.timed
     def get_element_text(self, xpath:str) -> str:
         """
         Returns the text of a given xpath element
         """
-        element = self.driver.find_element(By.XPATH, value=xpath)
-        return element.text
+        if self.dom_snapshot is not None:
+            return self.dom_snapshot.text(xpath)
+        return self.on_element(xpath, lambda element: element.text, wait_presence=False)
     
+    @Metrics.timed
     def get_elements_text(self, xpath:str) -> list:
         """
         Returns a list of text of a given xpath element
         """
-        elements = self.driver.find_elements(By.XPATH, value=xpath)
-        return [e.text for e in elements]
+        if self.dom_snapshot is not None:
+            return self.dom_snapshot.texts(xpath)
+        return self.extract({Chromedriver.TEXT: (xpath, Chromedriver.TEXT)}, columnar=True)[Chromedriver.TEXT]
+
+    @Metrics.timed
+    def extract(self, fields:dict[str,tuple[str,str]], rows_xpath:str=None, columnar:bool=False) -> list[dict]|dict[str,list]:
+        """
+        Extracts several xpaths and attributes with a single browser round trip.
+        'fields' maps a field name to (xpath, attribute), where the attribute Chromedriver.TEXT reads the rendered text of the element, empty when it is not displayed (as element.text).
+        Without 'rows_xpath' every field xpath is evaluated on the document and records are aligned by match index.
+        With 'rows_xpath' the field xpaths are relative to each row (e.g. './td[2]') and each record holds the first match per row.
+        Returns a list of records, or a dict of columns when columnar is True
+        """
+        if self.dom_snapshot is not None:
+            columns = self.dom_snapshot.extract(fields, rows_xpath)
+        else:
+            fields = {name: list(field) for name, field in fields.items()}
+            columns = self.driver.execute_script(Chromedriver.SCRIPT_EXTRACT, fields, rows_xpath)
+        if columnar:
+            return columns
+        length = max((len(column) for column in columns.values()), default=0)
+        return [{name: column[i] if i < len(column) else None for name, column in columns.items()} for i in range(length)]
     
+    @Metrics.timed
     def screenshot(self, path_file:str):
         """
         Takes a screenshot and saves in the given path
         """
         self.driver.save_screenshot(path_file)
     
+    @Metrics.timed
     def handle_windows(self) -> tuple[str,str]:
         """
         Returns the name of the main window and the pop up window when there is necessity for it
@@ -251,9 +1010,88 @@ class Chromedriver:
         pop_up = self.driver.window_handles[1]
         return main_window, pop_up
 
+    @Metrics.timed
     def switch_window(self, window:str):
         """
         Switches the driver to the given window
         """
+        self.invalidate_snapshot()
+        self.element_cache.clear()
         self.driver.switch_to.window(window)
-        
\ No newline at end of file
+
+    @Metrics.timed
+    def is_alive(self) -> bool:
+        """
+        Verifies if the browser session still answers to commands
+        """
+        if not hasattr(self, 'driver'):
+            return False
+        try:
+            self.driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    @Metrics.timed
+    def reset(self):
+        """
+        Cleans the session state without restarting the browser: closes extra windows, clears the cookies of every site and the
+        storage of the visited origins and goes to a blank page. The visited origins are the ones opened with get, the ones the
+        pages landed on after get and the interactions, and the ones of the frames of the open windows at reset time.
+        Origins only passed through (intermediate redirects, windows or iframes already closed by the page, navigations started
+        by page scripts and left before the next recorded interaction) are not known, so their storage survives; recycle
+        restarts the browser when a clean state must be guaranteed
+        """
+        main_window = self.driver.window_handles[0]
+        for window in self.driver.window_handles[1:]:
+            self.switch_window(window)
+            self.__add_frame_origins()
+            self.driver.close()
+        self.switch_window(main_window)
+        self.__add_frame_origins()
+        # delete_all_cookies only reaches the cookies of the current document domain
+        self.driver.execute_cdp_cmd('Network.clearBrowserCookies', dict())
+        for origin in self.visited_origins:
+            try:
+                self.driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+            except WebDriverException:
+                pass
+        self.visited_origins.clear()
+        try:
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except WebDriverException:
+            pass
+        self.get("about:blank")
+
+    def __add_current_origin(self):
+        """
+        Records the origin of the current page
+        """
+        try:
+            self.__add_visited_origin(self.driver.current_url)
+        except WebDriverException:
+            pass
+
+    def __add_frame_origins(self):
+        """
+        Records the origins of the current page and of every frame in it
+        """
+        self.__add_current_origin()
+        try:
+            frame_tree = (self.driver.execute_cdp_cmd('Page.getFrameTree', dict()) or dict()).get('frameTree')
+        except WebDriverException:
+            return
+        nodes = [frame_tree] if frame_tree else list()
+        while nodes:
+            node = nodes.pop()
+            frame = node.get('frame', dict())
+            self.__add_visited_origin(frame.get('securityOrigin') or frame.get('url', ""))
+            nodes.extend(node.get('childFrames', list()))
+
+    def __add_visited_origin(self, url:str):
+        """
+        Records the origin of a given http(s) url
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme in ('http', 'https') and parts.netloc:
+            self.visited_origins.add(f"{parts.scheme}://{parts.netloc}")
@@ -1,9 +1,12 @@
 import os
 import re
+import shutil
+import tempfile
 import urllib.request
 import xml.etree.ElementTree as ET
 
 from .os_utils import OSUtils
+from .version_cache import VersionCache
 
 class ChromedriverManager:
     """
@@ -14,12 +17,45 @@ class ChromedriverManager:
         "linux": "chromedriver",
         "win": "chromedriver.exe"
     }
+    STORAGE_URL = "https://chromedriver.storage.googleapis.com"     # can point to a mirror or a local server
+    version_cache = None
+
+    @classmethod
+    def get_version_cache(cls) -> VersionCache:
+        """
+        Returns the persistent version cache, created on first use
+        """
+        if cls.version_cache is None:
+            cls.version_cache = VersionCache()
+        return cls.version_cache
+
+    @classmethod
+    def get_chrome_binary_path(cls) -> str:
+        """
+        Returns the chrome browser binary path, or None when it can not be found
+        """
+        os_type = OSUtils.get_os_type()
+        if os_type == OSUtils.LINUX:
+            path_chrome = shutil.which("google-chrome")
+            return os.path.realpath(path_chrome) if path_chrome is not None else None
+        if os_type == OSUtils.MAC:
+            path_chrome = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+        else:
+            path_chrome = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Google", "Chrome", "Application", "chrome.exe")
+            if not os.path.isfile(path_chrome):
+                path_chrome = os.path.join(os.environ.get("PROGRAMFILES", ""), "Google", "Chrome", "Application", "chrome.exe")
+        return path_chrome if os.path.isfile(path_chrome) else None
 
     @classmethod
     def get_chrome_version(cls) -> str:
         """
         Returns the chrome browser version
         """
+        path_chrome = cls.get_chrome_binary_path()
+        if path_chrome is not None:
+            version = cls.get_version_cache().get_chrome_version(path_chrome)
+            if version is not None:
+                return version
         cmd_chrome_version_map = {
             OSUtils.LINUX: r"google-chrome --version",
             OSUtils.WINDOWS: ['powershell', '-command', '$(Get-ItemProperty -Path Registry::HKEY_CURRENT_USER\\Software\\Google\\chrome\\BLBeacon).version'],
@@ -30,6 +66,8 @@ class ChromedriverManager:
         print(cmd_return)
         version = re.search(cls.VERSION_PATTERN,
                             cmd_return).group(0)
+        if path_chrome is not None:
+            cls.get_version_cache().set_chrome_version(path_chrome, version)
         return version
     
     @classmethod
@@ -38,11 +76,16 @@ class ChromedriverManager:
         Returns the chromedriver version
         """
         abs_path = os.path.abspath(path_chromedriver)
+        file_hash = VersionCache.hash_file(abs_path)
+        version = cls.get_version_cache().get_chromedriver_version(file_hash)
+        if version is not None:
+            return version
         cmd = f"{abs_path} --version"
         cmd_return = OSUtils.send_terminal_command(cmd)
         print(cmd_return)
         version = re.search(cls.VERSION_PATTERN, 
                             cmd_return).group(0)
+        cls.get_version_cache().set_chromedriver_version(file_hash, version)
         return version
     
     @classmethod
@@ -68,7 +111,9 @@ class ChromedriverManager:
     @classmethod
     def download_chromedriver(cls, path_save_chromedriver:str) -> str:
         """
-        Downloads the the right version and system chromedriver and returns the path where it was extracted
+        Downloads the the right version and system chromedriver and returns the path where it was extracted.
+        Each version is installed in its own directory ('<path>/<version>/chromedriver') through an atomic rename and
+        a file lock makes a single process download it while concurrent processes wait and reuse the result
         """
         os.makedirs(path_save_chromedriver, exist_ok=True)
         os_url_mapping = {
@@ -77,12 +122,22 @@ class ChromedriverManager:
         }
 
         os_type = os_url_mapping[OSUtils.get_os_type()]
-        # chrome_major_version = cls.get_major_version(cls.get_chrome_version())
         chromedriver_download_version = cls.get_download_compatible_version()
-        io_chromedriver = OSUtils.download_from_url("https://chromedriver.storage.googleapis.com/" + chromedriver_download_version + '/chromedriver_' + os_type + ".zip")
-        OSUtils.extract_zip_file(io_chromedriver, path_save_chromedriver)
-        path_chromedriver = os.path.join(path_save_chromedriver, cls.CHROMEDRIVER_NAME_MAPPING[OSUtils.get_os_type()])
-        os.chmod(path_chromedriver, 0o744)       
+        path_dir_version = os.path.join(path_save_chromedriver, chromedriver_download_version)
+        path_chromedriver = os.path.join(path_dir_version, cls.CHROMEDRIVER_NAME_MAPPING[OSUtils.get_os_type()])
+        with OSUtils.file_lock(os.path.join(path_save_chromedriver, ".chromedriver.lock")):
+            if os.path.isfile(path_chromedriver):
+                return path_chromedriver
+            path_dir_tmp = tempfile.mkdtemp(dir=path_save_chromedriver, prefix=".chromedriver-")
+            try:
+                path_zip = os.path.join(path_dir_tmp, "chromedriver.zip")
+                path_dir_extract = os.path.join(path_dir_tmp, chromedriver_download_version)
+                OSUtils.download_to_file(cls.STORAGE_URL + "/" + chromedriver_download_version + '/chromedriver_' + os_type + ".zip", path_zip)
+                OSUtils.extract_zip_file(path_zip, path_dir_extract)
+                os.chmod(os.path.join(path_dir_extract, cls.CHROMEDRIVER_NAME_MAPPING[OSUtils.get_os_type()]), 0o744)
+                os.replace(path_dir_extract, path_dir_version)
+            finally:
+                shutil.rmtree(path_dir_tmp, ignore_errors=True)
         return path_chromedriver
 
     @classmethod
@@ -91,12 +146,27 @@ class ChromedriverManager:
         Returns the specific chromedriver version available on the chromedriver website relative with the chrome browser version
         """
         chrome_major_version = cls.get_major_version(cls.get_chrome_version())
-        response = urllib.request.urlopen("https://chromedriver.storage.googleapis.com").read()
+        versions = cls.get_version_cache().get_download_index(cls.STORAGE_URL)
+        if versions is None or chrome_major_version not in versions:
+            versions = cls.get_download_index()
+            cls.get_version_cache().set_download_index(cls.STORAGE_URL, versions)
+        if chrome_major_version in versions:
+            return versions[chrome_major_version]
+        raise Exception(f"Chromedriver version '{chrome_major_version}' not found to download.")
+
+    @classmethod
+    def get_download_index(cls) -> dict:
+        """
+        Returns the major version -> chromedriver version index built from the storage listing, keeping the first listed version of each major
+        """
+        response = urllib.request.urlopen(cls.STORAGE_URL).read()
         tree = ET.fromstring(response)
+        versions = dict()
         for i in tree.iter("{http://doc.s3.amazonaws.com/2006-03-01}Key"):
-            if i.text.find(chrome_major_version + '.') == 0:
-                return i.text.split('/')[0]
-        raise Exception(f"Chromedriver version '{chrome_major_version}' not found to download.")
+            version = i.text.split('/')[0]
+            if re.fullmatch(cls.VERSION_PATTERN, version):
+                versions.setdefault(cls.get_major_version(version), version)
+        return versions
     
     @classmethod
     def manage_chromedriver(cls, path_chromedriver:str) -> str:
@@ -106,22 +176,40 @@ class ChromedriverManager:
         if path_chromedriver is None:
             path_chromedriver = OSUtils.get_root_directory_path()
         path_chromedriver = os.path.abspath(path_chromedriver)
+        # incompatible drivers are left in place since another process may be running them, the right version is installed side by side
         if os.path.isfile(path_chromedriver) and cls.CHROMEDRIVER_NAME_MAPPING[OSUtils.get_os_type()] == os.path.basename(path_chromedriver):
             if cls.check_versions_compatibilty(path_chromedriver):
                 print("Chrome and chromedriver versions should be compatible.")            
                 return path_chromedriver
-            os.remove(path_chromedriver)
             path_dir_chromedriver = os.path.dirname(path_chromedriver)
         else:
             path_dir_chromedriver = path_chromedriver
             if not os.path.exists(path_dir_chromedriver):
                 os.makedirs(path_dir_chromedriver, exist_ok=True)
-            for file in os.listdir(path_dir_chromedriver):
-                path_file = os.path.join(path_dir_chromedriver, file)
-                if os.path.isfile(path_file) and cls.CHROMEDRIVER_NAME_MAPPING[OSUtils.get_os_type()] == file:
-                    if cls.check_versions_compatibilty(path_file):
-                        print("Chrome and chromedriver versions should be compatible.")     
-                        return path_file
-                    os.remove(path_file)
+        path_compatible = cls.find_compatible_chromedriver(path_dir_chromedriver)
+        if path_compatible is not None:
+            print("Chrome and chromedriver versions should be compatible.")
+            return path_compatible
         path_chromedriver = cls.download_chromedriver(path_dir_chromedriver)    
-        return path_chromedriver          
+        return path_chromedriver
+
+    @classmethod
+    def find_compatible_chromedriver(cls, path_dir_chromedriver:str) -> str:
+        """
+        Returns the path of a chromedriver compatible with chrome among the versions installed by download_chromedriver
+        ('<path>/<version>/chromedriver', newest first) and the one directly in the directory, or None
+        """
+        name = cls.CHROMEDRIVER_NAME_MAPPING[OSUtils.get_os_type()]
+        try:
+            major_version_chrome = cls.get_major_version(cls.get_chrome_version())
+            versions = [i for i in os.listdir(path_dir_chromedriver) if re.fullmatch(cls.VERSION_PATTERN, i)]
+        except Exception:
+            return None
+        versions.sort(key=lambda version: [int(i) for i in version.split('.')], reverse=True)
+        candidates = [os.path.join(path_dir_chromedriver, version, name) for version in versions
+                      if cls.get_major_version(version) == major_version_chrome]
+        candidates.append(os.path.join(path_dir_chromedriver, name))
+        for path_file in candidates:
+            if os.path.isfile(path_file) and cls.check_versions_compatibilty(path_file):
+                return path_file
+        return None
@@ -0,0 +1,184 @@
+import os
+import queue
+import pickle
+import multiprocessing
+from collections import deque
+from selenium.common.exceptions import WebDriverException
+
+from .chromedriver import Chromedriver
+from .process_registry import ProcessRegistry
+
+class CrawlRunner:
+    """
+    Class to run tasks over a pool of worker processes, each one owning a long lived Chromedriver.
+    'fn(chromedriver, task)' must be picklable (a module level function), as must the tasks and the results
+    """
+    PREFETCH = 2                # tasks assigned to a worker at a time (the running one plus the next ones)
+    MAX_RETRIES = 2
+    POLL_TIMEOUT = .5           # seconds
+    JOIN_TIMEOUT = 10           # seconds
+    OK = "ok"
+    ERROR = "error"
+    CRASH = "crash"
+
+    def __init__(self, fn, processes:int=None, prefetch:int=None, max_retries:int=None, **chromedriver_kwargs):
+        """
+        class constructor. The number of tasks in flight is bounded by processes*prefetch
+        """
+        self.fn = fn
+        self.processes = os.cpu_count() if processes is None else processes
+        self.prefetch = CrawlRunner.PREFETCH if prefetch is None else prefetch
+        self.max_retries = CrawlRunner.MAX_RETRIES if max_retries is None else max_retries
+        self.chromedriver_kwargs = chromedriver_kwargs
+
+    @staticmethod
+    def _worker(fn, chromedriver_kwargs:dict, task_queue, result_queue):
+        """
+        Worker process loop: runs the received tasks with its own Chromedriver, relaunching it when the browser crashes
+        """
+        chrome = None
+        try:
+            while True:
+                item = task_queue.get()
+                if item is None:
+                    break
+                task_id, task = item
+                try:
+                    if chrome is None:
+                        chrome = Chromedriver(**chromedriver_kwargs)
+                    result = fn(chrome, task)
+                    try:
+                        pickle.dumps(result)
+                    except Exception as e:
+                        # the queue pickles in a feeder thread and would drop the result silently
+                        result_queue.put((task_id, CrawlRunner.ERROR, Exception(f"The result of the task is not picklable: {e!r}")))
+                        continue
+                    result_queue.put((task_id, CrawlRunner.OK, result))
+                except Exception as e:
+                    status = CrawlRunner.ERROR
+                    if isinstance(e, WebDriverException) and (chrome is None or not chrome.is_alive()):
+                        status = CrawlRunner.CRASH
+                        if chrome is not None:
+                            chrome.close()
+                        chrome = None
+                    try:
+                        pickle.dumps(e)
+                    except Exception:
+                        e = Exception(repr(e))
+                    result_queue.put((task_id, status, e))
+        finally:
+            if chrome is not None:
+                chrome.close()
+            Chromedriver.kill_chrome_children()
+
+    def __start_worker(self, context, result_queue) -> tuple:
+        """
+        Starts a worker process, returns (process, task queue, assigned task ids)
+        """
+        task_queue = context.Queue()
+        process = context.Process(target=CrawlRunner._worker,
+                                  args=(self.fn, self.chromedriver_kwargs, task_queue, result_queue),
+                                  daemon=True)
+        process.start()
+        return process, task_queue, set()
+
+    @staticmethod
+    def __stop_workers(workers:list):
+        """
+        Asks every worker to finish and kills the ones (and their browsers) that do not
+        """
+        for process, task_queue, _ in workers:
+            if process.is_alive():
+                task_queue.put(None)
+        for process, _, _ in workers:
+            process.join(CrawlRunner.JOIN_TIMEOUT)
+            if process.is_alive():
+                try:
+                    Chromedriver.kill_chrome_children(process.pid)
+                except Exception:
+                    pass
+                process.kill()
+                process.join()
+
+    def __restart_dead_workers(self, workers:list, in_flight:dict, pending:deque, context, result_queue) -> list:
+        """
+        Replaces the dead workers and requeues their tasks, returns the (task, error) of the ones out of retries
+        """
+        failed = list()
+        for index, (process, _, assigned) in enumerate(workers):
+            if process.is_alive():
+                continue
+            print(f"Crawl worker {process.pid} died, restarting it.")
+            # the browser of the dead worker is orphaned, kill it before it piles up
+            ProcessRegistry.reap()
+            for task_id in assigned:
+                if task_id not in in_flight:
+                    continue
+                in_flight[task_id][1] += 1
+                if in_flight[task_id][1] > self.max_retries:
+                    task = in_flight.pop(task_id)[0]
+                    failed.append((task, Exception(f"Crawl worker died running the task {task!r}.")))
+                else:
+                    pending.append(task_id)
+            workers[index] = self.__start_worker(context, result_queue)
+        return failed
+
+    def run(self, tasks, return_exceptions:bool=False):
+        """
+        Yields (task, result) as the workers finish the tasks, in completion order.
+        Tasks whose browser (or worker process) crashed are retried up to max_retries times. With return_exceptions the errors
+        are yielded as results instead of raised
+        """
+        context = multiprocessing.get_context()
+        result_queue = context.Queue()
+        workers = [self.__start_worker(context, result_queue) for _ in range(self.processes)]
+        tasks = iter(tasks)
+        exhausted = False
+        pending = deque()   # task ids to be (re)assigned
+        in_flight = dict()  # task id -> [task, attempts]
+        next_id = 0
+        try:
+            while True:
+                for worker in workers:
+                    while len(worker[2]) < self.prefetch:
+                        if not pending and not exhausted:
+                            try:
+                                in_flight[next_id] = [next(tasks), 0]
+                                pending.append(next_id)
+                                next_id += 1
+                            except StopIteration:
+                                exhausted = True
+                        if not pending:
+                            break
+                        task_id = pending.popleft()
+                        if task_id not in in_flight:
+                            continue
+                        worker[2].add(task_id)
+                        worker[1].put((task_id, in_flight[task_id][0]))
+                if not in_flight:
+                    return
+
+                # checked on every iteration, the results of the other workers can keep the queue from ever being empty
+                for task, error in self.__restart_dead_workers(workers, in_flight, pending, context, result_queue):
+                    if not return_exceptions:
+                        raise error
+                    yield task, error
+                try:
+                    task_id, status, result = result_queue.get(timeout=CrawlRunner.POLL_TIMEOUT)
+                except queue.Empty:
+                    continue
+
+                for _, _, assigned in workers:
+                    assigned.discard(task_id)
+                if task_id not in in_flight:
+                    continue
+                if status == CrawlRunner.CRASH and in_flight[task_id][1] < self.max_retries:
+                    in_flight[task_id][1] += 1
+                    pending.append(task_id)
+                    continue
+                task = in_flight.pop(task_id)[0]
+                if status != CrawlRunner.OK and not return_exceptions:
+                    raise result
+                yield task, result
+        finally:
+            self.__stop_workers(workers)
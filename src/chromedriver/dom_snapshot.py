@@ -0,0 +1,166 @@
+import re
+import urllib.parse
+from selenium.common.exceptions import NoSuchElementException
+
+try:
+    import lxml.html
+except ImportError:     # optional dependency, only needed by the snapshot mode
+    lxml = None
+
+class DomSnapshot:
+    """
+    Class to run read-only xpath queries locally against a parsed copy of the page source.
+    Reads follow the live extraction: texts approximate innerText (script/style and hidden markup skipped, line breaks
+    between blocks and a tab between table cells) and url attributes are resolved like their properties.
+    Styles are not computed, so elements hidden by stylesheets are read, and properties changed by scripts after the
+    capture (e.g. typed values) are not seen
+    """
+    TEXT = 'text'
+    WHITESPACE_PATTERN = re.compile(r"\s+")
+    INLINE_WHITESPACE_PATTERN = re.compile(r"[ \t\r\f\v]+")
+    DISPLAY_NONE_PATTERN = re.compile(r"display\s*:\s*none")
+    CELL_SEPARATOR = "\0"
+    NOT_RENDERED_TAGS = {'head', 'script', 'style', 'template', 'noscript', 'title', 'meta', 'link'}
+    BLOCK_TAGS = {'address', 'article', 'aside', 'blockquote', 'caption', 'dd', 'details', 'div', 'dl', 'dt', 'fieldset', 'figcaption',
+                  'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+                  'section', 'summary', 'table', 'tbody', 'tfoot', 'thead', 'tr', 'ul'}
+    URL_ATTRIBUTES = {'href', 'src', 'action', 'formaction', 'poster', 'cite'}
+    BOOLEAN_ATTRIBUTES = {'checked', 'selected', 'disabled', 'readonly', 'required', 'multiple', 'hidden', 'autofocus', 'open'}
+
+    def __init__(self, page_source:str, url:str=None):
+        """
+        class constructor. 'url' is the page address the url attributes are resolved against
+        """
+        if lxml is None:
+            raise Exception("The snapshot mode requires lxml. Install it with 'pip install lxml'.")
+        self.tree = lxml.html.document_fromstring(page_source)
+        base = self.tree.xpath("//base[@href]/@href")
+        self.base_url = urllib.parse.urljoin(url or "", base[0]) if base else url
+
+    def find_all(self, xpath:str, context=None) -> list:
+        """
+        Returns every node (or string, for attribute and text xpaths) matched by a given xpath
+        """
+        context = self.tree if context is None else context
+        result = context.xpath(xpath)
+        return result if isinstance(result, list) else [result]
+
+    def find(self, xpath:str):
+        """
+        Returns the first node matched by a given xpath
+        """
+        nodes = self.find_all(xpath)
+        if len(nodes) == 0:
+            raise NoSuchElementException(f"Element '{xpath}' not found in the page snapshot.")
+        return nodes[0]
+
+    def exists(self, xpath:str) -> bool:
+        """
+        Verifies if a given xpath matches any node
+        """
+        return len(self.find_all(xpath)) > 0
+
+    def read(self, node, attribute:str) -> str:
+        """
+        Returns the text or the given attribute of a node
+        """
+        if isinstance(node, str):
+            return DomSnapshot.WHITESPACE_PATTERN.sub(' ', node).strip()
+        if attribute == DomSnapshot.TEXT:
+            return DomSnapshot.render_text(node)
+        value = node.get(attribute)
+        if attribute in DomSnapshot.BOOLEAN_ATTRIBUTES:
+            return 'true' if value is not None else None
+        if attribute in DomSnapshot.URL_ATTRIBUTES and value is not None and self.base_url:
+            return urllib.parse.urljoin(self.base_url, value.strip())
+        return value
+
+    @staticmethod
+    def is_hidden(node) -> bool:
+        """
+        Verifies if a node is not rendered according to its markup
+        """
+        return (node.tag in DomSnapshot.NOT_RENDERED_TAGS
+                or node.get('hidden') is not None
+                or (node.tag == 'input' and (node.get('type') or '').lower() == 'hidden')
+                or DomSnapshot.DISPLAY_NONE_PATTERN.search(node.get('style') or '') is not None)
+
+    @staticmethod
+    def render_text(node) -> str:
+        """
+        Returns an approximation of the innerText of a node. A node that is not rendered returns its whole text, like innerText
+        """
+        if DomSnapshot.is_hidden(node):
+            return DomSnapshot.WHITESPACE_PATTERN.sub(' ', node.text_content()).strip()
+        parts = list()
+        DomSnapshot.__render(node, parts)
+        lines = list()
+        for line in "".join(parts).split("\n"):
+            cells = [DomSnapshot.INLINE_WHITESPACE_PATTERN.sub(' ', cell).strip() for cell in line.split(DomSnapshot.CELL_SEPARATOR)]
+            line = "\t".join(cells).strip()
+            if line:
+                lines.append(line)
+        return "\n".join(lines)
+
+    @staticmethod
+    def __render(node, parts:list):
+        if not isinstance(node.tag, str) or DomSnapshot.is_hidden(node):
+            return
+        if node.tag == 'br':
+            parts.append("\n")
+            return
+        block = node.tag in DomSnapshot.BLOCK_TAGS
+        if block:
+            parts.append("\n")
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            DomSnapshot.__render(child, parts)
+            if child.tail:
+                parts.append(child.tail)
+        if node.tag in ('td', 'th') and node.getnext() is not None:
+            parts.append(DomSnapshot.CELL_SEPARATOR)
+        if block:
+            parts.append("\n")
+
+    def text(self, xpath:str) -> str:
+        """
+        Returns the text of the first node matched by a given xpath
+        """
+        return self.read(self.find(xpath), DomSnapshot.TEXT)
+
+    def texts(self, xpath:str) -> list:
+        """
+        Returns the text of every node matched by a given xpath
+        """
+        return [self.read(node, DomSnapshot.TEXT) for node in self.find_all(xpath)]
+
+    def attribute(self, xpath:str, attribute:str) -> str:
+        """
+        Returns the given attribute of the first node matched by a given xpath
+        """
+        return self.read(self.find(xpath), attribute)
+
+    def attributes(self, xpath:str, attribute:str) -> list:
+        """
+        Returns the given attribute of every node matched by a given xpath
+        """
+        return [self.read(node, attribute) for node in self.find_all(xpath)]
+
+    def extract(self, fields:dict[str,tuple[str,str]], rows_xpath:str=None) -> dict[str,list]:
+        """
+        Local equivalent of the Chromedriver.extract script, returns the columns of each field
+        """
+        columns = dict()
+        if rows_xpath is None:
+            for name, (xpath, attribute) in fields.items():
+                columns[name] = [self.read(node, attribute) for node in self.find_all(xpath)]
+            return columns
+        rows = self.find_all(rows_xpath)
+        for name, (xpath, attribute) in fields.items():
+            column = list()
+            for row in rows:
+                nodes = self.find_all(xpath, row)
+                column.append(self.read(nodes[0], attribute) if len(nodes) > 0 else None)
+            columns[name] = column
+        return columns
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import threading
+from time import monotonic
+
+from .cdp import CDPConnection
+
+class DownloadManager:
+    """
+    Class to track the downloads of a browser through the devtools Browser.downloadWillBegin/downloadProgress events.
+    Files are saved under their guid while in progress and renamed to a unique version of their suggested name when completed
+    """
+    TIMEOUT = 60*3      # seconds
+    IN_PROGRESS = "inProgress"
+    COMPLETED = "completed"
+    CANCELED = "canceled"
+
+    def __init__(self, path_downloads:str, isolated:bool=False, on_progress=None):
+        """
+        class constructor. With isolated each session downloads into its own subdirectory of path_downloads.
+        'on_progress(download)' receives the download dict on every progress event
+        """
+        os.makedirs(path_downloads, exist_ok=True)
+        self.path_downloads = tempfile.mkdtemp(prefix="session-", dir=path_downloads) if isolated else path_downloads
+        self.on_progress = on_progress
+        self.downloads = dict()     # guid -> download dict
+        self.connection = None
+        self.__harvested = set()
+        self.__condition = threading.Condition()
+
+    def attach(self, connection:CDPConnection):
+        """
+        Starts tracking the downloads through a devtools browser connection, replacing the previous one (e.g. after a recycle)
+        """
+        self.detach()
+        self.connection = connection
+        connection.on('Browser.downloadWillBegin', self.__on_download_will_begin)
+        connection.on('Browser.downloadProgress', self.__on_download_progress)
+        connection.execute('Browser.setDownloadBehavior', {'behavior': 'allowAndName',
+                                                           'downloadPath': self.path_downloads,
+                                                           'eventsEnabled': True})
+
+    def detach(self):
+        """
+        Stops tracking the downloads
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __on_download_will_begin(self, params:dict):
+        with self.__condition:
+            self.downloads[params['guid']] = {
+                'guid': params['guid'],
+                'url': params.get('url'),
+                'filename': params.get('suggestedFilename'),
+                'state': DownloadManager.IN_PROGRESS,
+                'received_bytes': 0,
+                'total_bytes': 0,
+                'path': None,
+            }
+            self.__condition.notify_all()
+
+    def __on_download_progress(self, params:dict):
+        with self.__condition:
+            download = self.downloads.get(params['guid'])
+            if download is None:
+                return
+            download['received_bytes'] = params.get('receivedBytes', download['received_bytes'])
+            download['total_bytes'] = params.get('totalBytes', download['total_bytes'])
+            download['state'] = params.get('state', download['state'])
+            if download['state'] == DownloadManager.COMPLETED:
+                download['path'] = self.__rename(download)
+            self.__condition.notify_all()
+        if self.on_progress is not None:
+            self.on_progress(dict(download))
+
+    def __rename(self, download:dict) -> str:
+        """
+        Moves a completed download from its guid to its suggested file name, adding a counter when the name is taken
+        """
+        path_guid = os.path.join(self.path_downloads, download['guid'])
+        name, extension = os.path.splitext(download['filename'] or download['guid'])
+        path_file = os.path.join(self.path_downloads, name + extension)
+        counter = 1
+        while os.path.exists(path_file):
+            path_file = os.path.join(self.path_downloads, f"{name} ({counter}){extension}")
+            counter += 1
+        try:
+            os.replace(path_guid, path_file)
+        except OSError:
+            return path_guid
+        return path_file
+
+    def wait_for_downloads(self, timeout:float=None, expected:int=None) -> list[dict]:
+        """
+        Waits until every started download is finished (and at least 'expected' of them started since the last call)
+        and returns the ones finished since the last call with their final path and byte count
+        """
+        timeout = DownloadManager.TIMEOUT if timeout is None else timeout
+        deadline = monotonic() + timeout
+        with self.__condition:
+            while True:
+                pending = [d for g, d in self.downloads.items() if g not in self.__harvested]
+                in_progress = [d for d in pending if d['state'] == DownloadManager.IN_PROGRESS]
+                if not in_progress and (expected is None or len(pending) >= expected):
+                    break
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"{len(in_progress)} download(s) not finished after {timeout} seconds.")
+                self.__condition.wait(remaining)
+            self.__harvested.update(d['guid'] for d in pending)
+            return [dict(d) for d in pending]
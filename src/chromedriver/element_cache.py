@@ -0,0 +1,53 @@
+class ElementCache:
+    """
+    Class to keep the WebElement handles located by xpath on the current page, so repeated interactions skip the xpath evaluation.
+    Handles must be dropped on navigation, window switch and after interactions that can change which element an xpath matches
+    (positional or predicate xpaths), stale ones are dropped by the caller on StaleElementReferenceException
+    """
+    def __init__(self, enabled:bool=True):
+        """
+        class constructor
+        """
+        self.enabled = enabled
+        self.elements = dict()  # xpath -> WebElement
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def get(self, xpath:str):
+        """
+        Returns the cached handle of a given xpath, or None
+        """
+        element = self.elements.get(xpath) if self.enabled else None
+        if element is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return element
+
+    def put(self, xpath:str, element):
+        """
+        Caches the handle of a given xpath
+        """
+        if self.enabled:
+            self.elements[xpath] = element
+
+    def discard(self, xpath:str):
+        """
+        Drops the handle of a given xpath
+        """
+        self.elements.pop(xpath, None)
+
+    def clear(self):
+        """
+        Drops every handle, the counters are kept
+        """
+        self.elements.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Returns the hit and miss counters
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.elements)}
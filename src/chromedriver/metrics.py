@@ -0,0 +1,132 @@
+import json
+import inspect
+import threading
+from time import perf_counter
+from functools import wraps
+
+class Metrics:
+    """
+    Class to aggregate timings into histograms and export them as json or prometheus text.
+    Names are prefixed by their kind: 'method.' for Chromedriver public methods, 'command.' for WebDriver commands,
+    'wait.' for the waits after interactions and 'startup.' for the driver startup
+    """
+    BUCKETS = (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)   # seconds
+    PROMETHEUS_NAME = "chromedriver_duration_seconds"
+
+    def __init__(self, buckets:tuple=None):
+        """
+        class constructor
+        """
+        self.buckets = Metrics.BUCKETS if buckets is None else tuple(sorted(buckets))
+        self.histograms = dict()    # name -> {"counts": [...], "count": int, "sum": float}
+        self.sinks = list()
+        self.__lock = threading.Lock()
+
+    def add_sink(self, sink):
+        """
+        Registers a callable receiving every observation as sink(name, seconds)
+        """
+        self.sinks.append(sink)
+
+    def observe(self, name:str, seconds:float):
+        """
+        Records a timing
+        """
+        with self.__lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = {"counts": [0]*len(self.buckets), "count": 0, "sum": 0.0}
+                self.histograms[name] = histogram
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram["counts"][i] += 1
+                    break
+            histogram["count"] += 1
+            histogram["sum"] += seconds
+        for sink in self.sinks:
+            sink(name, seconds)
+
+    def reset(self):
+        """
+        Discards every recorded timing
+        """
+        with self.__lock:
+            self.histograms.clear()
+
+    def to_dict(self) -> dict:
+        """
+        Returns the histograms with cumulative bucket counts
+        """
+        with self.__lock:
+            result = dict()
+            for name, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                buckets = dict()
+                for bound, count in zip(self.buckets, histogram["counts"]):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                buckets["+Inf"] = histogram["count"]
+                result[name] = {"count": histogram["count"], "sum": histogram["sum"], "buckets": buckets}
+            return result
+
+    def to_json(self) -> str:
+        """
+        Returns the histograms as a json string
+        """
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the histograms in the prometheus text exposition format
+        """
+        lines = [f"# TYPE {Metrics.PROMETHEUS_NAME} histogram"]
+        for name, histogram in self.to_dict().items():
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{Metrics.PROMETHEUS_NAME}_bucket{{name="{name}",le="{bound}"}} {count}')
+            lines.append(f'{Metrics.PROMETHEUS_NAME}_sum{{name="{name}"}} {histogram["sum"]}')
+            lines.append(f'{Metrics.PROMETHEUS_NAME}_count{{name="{name}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def timed(method):
+        """
+        Decorator timing a Chromedriver (or AsyncChromedriver coroutine) method into its 'metrics' attribute.
+        Costs a single attribute check when metrics is None
+        """
+        name = "method." + method.__name__
+        if inspect.iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                metrics = self.metrics
+                if metrics is None:
+                    return await method(self, *args, **kwargs)
+                start = perf_counter()
+                try:
+                    return await method(self, *args, **kwargs)
+                finally:
+                    metrics.observe(name, perf_counter() - start)
+            return async_wrapper
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            metrics = getattr(self, 'metrics', None)   # close runs from __del__ on partially built instances
+            if metrics is None:
+                return method(self, *args, **kwargs)
+            start = perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                metrics.observe(name, perf_counter() - start)
+        return wrapper
+
+    def instrument_driver(self, driver):
+        """
+        Times every WebDriver command sent by a given selenium driver
+        """
+        execute = driver.execute
+        def timed_execute(driver_command:str, params:dict=None):
+            start = perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self.observe("command." + driver_command, perf_counter() - start)
+        driver.execute = timed_execute
@@ -4,9 +4,15 @@ import psutil
 import signal
 import platform
 import subprocess
+import base64
+import shutil
+import hashlib
+import tempfile
 import zipfile
 import urllib.request
 from io import BytesIO
+from time import sleep
+from contextlib import contextmanager
 
 class OSUtils:
     """
@@ -15,6 +21,9 @@ class OSUtils:
     LINUX   = "linux"
     WINDOWS = "win"
     MAC     = "mac"
+    DOWNLOAD_CHUNK_SIZE = 1024*256  # bytes
+    FICLONE = 0x40049409            # linux ioctl sharing the blocks of a file (reflink), within a single btrfs/xfs filesystem
+    PATH_TMPFS = "/dev/shm"
     
     @staticmethod
     def get_os_type() -> str:
@@ -74,13 +83,115 @@ class OSUtils:
         return BytesIO(response.read())
     
     @staticmethod
-    def extract_zip_file(file:BytesIO, path:str):
+    def download_to_file(url:str, path_file:str, sha256:str=None):
         """
-        Extracts a file from a buffer into a given system path
+        Streams a file from a given url into a temporary file and moves it to the given path once complete and verified.
+        The checksum is verified against the given sha256 and against the md5 the server reports in the 'x-goog-hash' header
+        """
+        path_dir = os.path.dirname(os.path.abspath(path_file))
+        fd, path_tmp = tempfile.mkstemp(dir=path_dir, prefix=".download-", suffix=".tmp")
+        try:
+            hash_sha256 = hashlib.sha256()
+            hash_md5 = hashlib.md5()
+            size = 0
+            with os.fdopen(fd, 'wb') as file, urllib.request.urlopen(url) as response:
+                for chunk in iter(lambda: response.read(OSUtils.DOWNLOAD_CHUNK_SIZE), b''):
+                    file.write(chunk)
+                    hash_sha256.update(chunk)
+                    hash_md5.update(chunk)
+                    size += len(chunk)
+                headers = response.headers
+            content_length = headers.get("Content-Length")
+            if content_length is not None and int(content_length) != size:
+                raise Exception(f"Incomplete download from '{url}': {size} of {content_length} bytes.")
+            for goog_hash in headers.get_all("x-goog-hash") or list():
+                for item in goog_hash.split(','):
+                    name, _, value = item.strip().partition('=')
+                    if name == "md5" and base64.b64decode(value) != hash_md5.digest():
+                        raise Exception(f"Checksum mismatch downloading '{url}'.")
+            if sha256 is not None and sha256.lower() != hash_sha256.hexdigest():
+                raise Exception(f"Checksum mismatch downloading '{url}'.")
+            os.replace(path_tmp, path_file)
+        except BaseException:
+            if os.path.exists(path_tmp):
+                os.remove(path_tmp)
+            raise
+
+    @staticmethod
+    @contextmanager
+    def file_lock(path_lock:str, timeout:float=60*5):
+        """
+        Context manager holding an exclusive inter-process lock on a given lock file
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path_lock)), exist_ok=True)
+        with open(path_lock, 'a+') as file:
+            if OSUtils.get_os_type() == OSUtils.WINDOWS:
+                import msvcrt
+                file.seek(0)
+                lock = lambda: msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+                unlock = lambda: msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                lock = lambda: fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                unlock = lambda: fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            waited = 0
+            while True:
+                try:
+                    lock()
+                    break
+                except OSError:
+                    if waited >= timeout:
+                        raise TimeoutError(f"Could not lock '{path_lock}' after {timeout} seconds.")
+                    sleep(.1)
+                    waited += .1
+            try:
+                yield
+            finally:
+                unlock()
+
+    @staticmethod
+    def extract_zip_file(file:BytesIO|str, path:str):
+        """
+        Extracts a zip file, from a buffer or a system path, into a given system path
         """
         with zipfile.ZipFile(file, 'r') as zip_file:
             zip_file.extractall(path)
     
+    @staticmethod
+    def clone_file(path_src:str, path_dst:str):
+        """
+        Copies a file as a reflink when both paths are on the same filesystem and it supports them, otherwise as a plain copy
+        """
+        if OSUtils.get_os_type() == OSUtils.LINUX and os.stat(path_src).st_dev == os.stat(os.path.dirname(os.path.abspath(path_dst))).st_dev:
+            import fcntl
+            try:
+                with open(path_src, 'rb') as src, open(path_dst, 'wb') as dst:
+                    fcntl.ioctl(dst.fileno(), OSUtils.FICLONE, src.fileno())
+                shutil.copystat(path_src, path_dst)
+                return path_dst
+            except OSError:
+                pass
+        return shutil.copy2(path_src, path_dst)
+
+    @staticmethod
+    def clone_directory(path_src:str, path_dst:str, ignore:list[str]=None):
+        """
+        Copies a directory tree file by file with clone_file, skipping the given name patterns
+        """
+        shutil.copytree(path_src, path_dst,
+                        copy_function=OSUtils.clone_file,
+                        ignore=shutil.ignore_patterns(*ignore) if ignore else None,
+                        symlinks=True)
+
+    @staticmethod
+    def get_tmpfs_directory_path() -> str:
+        """
+        Returns a memory backed temporary directory when there is one, otherwise the system temporary directory
+        """
+        if os.path.isdir(OSUtils.PATH_TMPFS) and os.access(OSUtils.PATH_TMPFS, os.W_OK):
+            return OSUtils.PATH_TMPFS
+        return tempfile.gettempdir()
+
     @staticmethod
     def kill_process_children(script_name:str):
         """
@@ -102,9 +213,11 @@ class OSUtils:
         """
         Returns the found ids from a given process/script
         """
-        cmd = "ps -ef | grep " + process_name + " | awk '{print $2}'"
-        cmd_output = OSUtils.send_terminal_command(cmd)
-        process_ids = [int(line) for line in cmd_output.splitlines()]
+        process_ids = list()
+        for process in psutil.process_iter(['name', 'cmdline']):
+            cmdline = ' '.join(process.info['cmdline'] or list())
+            if process.info['name'] == process_name or process_name in cmdline:
+                process_ids.append(process.pid)
         return process_ids
     
     @staticmethod
@@ -0,0 +1,174 @@
+import threading
+from time import monotonic
+from contextlib import contextmanager
+
+from .chromedriver import Chromedriver
+
+class ChromedriverPool:
+    """
+    Class to keep a pool of warm Chromedriver instances to be reused between jobs
+    """
+    TIMEOUT = 60            # seconds
+    IDLE_TIMEOUT = 60*5     # seconds
+
+    def __init__(self, size:int=1, max_size:int=None, idle_timeout:float=None, **chromedriver_kwargs):
+        """
+        class constructor. Launches 'size' instances right away and grows up to 'max_size' on demand
+        """
+        self.size = size
+        self.max_size = size if max_size is None else max(max_size, size)
+        self.idle_timeout = ChromedriverPool.IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        # every pooled instance shares the process, so they must not kill each other's chrome processes
+        chromedriver_kwargs['kill_chrome'] = False
+        self.chromedriver_kwargs = chromedriver_kwargs
+
+        self.__condition = threading.Condition()
+        self.__idle = list()        # (chromedriver, last checkin time)
+        self.__in_use = set()
+        self.__closed = False
+
+        for _ in range(self.size):
+            self.__idle.append((self.__new_chromedriver(), monotonic()))
+
+    def __del__(self):
+        """
+        Class destructor
+        """
+        if hasattr(self, '_ChromedriverPool__condition'):
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        with self.__condition:
+            return len(self.__idle) + len(self.__in_use)
+
+    def __new_chromedriver(self) -> Chromedriver:
+        """
+        Launches a new Chromedriver instance
+        """
+        return Chromedriver(**self.chromedriver_kwargs)
+
+    @staticmethod
+    def __dispose(chrome:Chromedriver):
+        """
+        Closes a Chromedriver instance ignoring a session that is already dead
+        """
+        try:
+            chrome.close()
+        except Exception:
+            pass
+
+    def evict_idle(self):
+        """
+        Closes idle instances that were not used for longer than idle_timeout, keeping at least 'size' instances alive
+        """
+        now = monotonic()
+        evicted = list()
+        with self.__condition:
+            for item in list(self.__idle):
+                if len(self.__idle) + len(self.__in_use) <= self.size:
+                    break
+                if now - item[1] > self.idle_timeout:
+                    self.__idle.remove(item)
+                    evicted.append(item[0])
+        for chrome in evicted:
+            self.__dispose(chrome)
+
+    def checkout(self, timeout:float=None) -> Chromedriver:
+        """
+        Returns a healthy Chromedriver instance from the pool, waiting up to timeout seconds when the pool is exhausted
+        """
+        timeout = ChromedriverPool.TIMEOUT if timeout is None else timeout
+        self.evict_idle()
+        deadline = monotonic() + timeout
+        with self.__condition:
+            while True:
+                if self.__closed:
+                    raise Exception("Chromedriver pool is closed.")
+                if self.__idle:
+                    chrome = self.__idle.pop()[0]
+                    break
+                if len(self.__in_use) < self.max_size:
+                    chrome = None
+                    break
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No chromedriver available in the pool after {timeout} seconds.")
+                self.__condition.wait(remaining)
+            # reserves the slot before leaving the lock, launching or health checking happens outside of it
+            reserved = object() if chrome is None else chrome
+            self.__in_use.add(reserved)
+
+        try:
+            if chrome is None or not chrome.is_alive():
+                if chrome is not None:
+                    self.__dispose(chrome)
+                chrome = self.__new_chromedriver()
+        except Exception:
+            with self.__condition:
+                self.__in_use.discard(reserved)
+                self.__condition.notify()
+            raise
+        with self.__condition:
+            self.__in_use.discard(reserved)
+            self.__in_use.add(chrome)
+        return chrome
+
+    def checkin(self, chrome:Chromedriver):
+        """
+        Returns a Chromedriver instance to the pool, resetting its state or replacing it when it is dead
+        """
+        try:
+            chrome.reset()
+            healthy = True
+        except Exception:
+            healthy = False
+        with self.__condition:
+            self.__in_use.discard(chrome)
+            keep = healthy and not self.__closed
+            if keep:
+                self.__idle.append((chrome, monotonic()))
+            replace = not healthy and not self.__closed and len(self.__idle) + len(self.__in_use) < self.size
+            self.__condition.notify()
+        if not keep:
+            self.__dispose(chrome)
+        if replace:
+            print("Dead chromedriver session replaced in the pool.")
+            replacement = self.__new_chromedriver()
+            with self.__condition:
+                closed = self.__closed
+                if not closed:
+                    self.__idle.append((replacement, monotonic()))
+                    self.__condition.notify()
+            if closed:
+                self.__dispose(replacement)
+
+    @contextmanager
+    def chromedriver(self, timeout:float=None):
+        """
+        Context manager that checks out a Chromedriver instance and checks it in on exit
+        """
+        chrome = self.checkout(timeout)
+        try:
+            yield chrome
+        finally:
+            self.checkin(chrome)
+
+    def close(self):
+        """
+        Closes every idle instance. Instances still checked out are closed when checked in
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            idle = [item[0] for item in self.__idle]
+            self.__idle.clear()
+            self.__condition.notify_all()
+        for chrome in idle:
+            self.__dispose(chrome)
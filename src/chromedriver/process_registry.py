@@ -0,0 +1,216 @@
+import os
+import json
+import signal
+import getpass
+import tempfile
+import threading
+import psutil
+from stat import S_ISDIR
+
+class ProcessRegistry:
+    """
+    Class to track the launched chromedriver/chrome process groups in a pid file directory shared by the processes of the user.
+    Each group is killed at once with killpg, and the reaper kills the groups whose owner process is dead (crashed workers).
+    The group leader identity (create time and name) is recorded, so a reused pid is never killed
+    """
+    PATH_PIDS = os.path.join(tempfile.gettempdir(),
+                             f"chromedriver_module-{os.getuid() if hasattr(os, 'getuid') else getpass.getuser()}",
+                             "pids")
+    REAPER_INTERVAL = 30    # seconds
+    __reaper = None
+    __reaper_stop = threading.Event()
+
+    @staticmethod
+    def supports_process_groups() -> bool:
+        """
+        Verifies if the system has process groups (posix)
+        """
+        return hasattr(os, 'killpg')
+
+    @staticmethod
+    def get_popen_kw() -> dict:
+        """
+        Returns the subprocess arguments that start a process in a new process group
+        """
+        return {'start_new_session': True} if ProcessRegistry.supports_process_groups() else dict()
+
+    @classmethod
+    def get_pid_file(cls, pgid:int) -> str:
+        """
+        Returns the pid file path of a given process group
+        """
+        return os.path.join(cls.PATH_PIDS, f"{pgid}.pid")
+
+    @classmethod
+    def is_pids_directory_private(cls) -> bool:
+        """
+        Verifies if the pid file directory, and the user directory holding it, are real directories of the user with mode 0700,
+        so no other user could have planted pid files in them
+        """
+        if not hasattr(os, 'getuid'):
+            return True
+        for path in (os.path.dirname(cls.PATH_PIDS), cls.PATH_PIDS):
+            try:
+                stat = os.lstat(path)
+            except OSError:
+                return False
+            if not S_ISDIR(stat.st_mode) or stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+                return False
+        return True
+
+    @classmethod
+    def make_pids_directory(cls):
+        """
+        Creates the pid file directory private to the user, refusing one created by another user or open to others
+        """
+        path_user = os.path.dirname(cls.PATH_PIDS)
+        os.makedirs(path_user, mode=0o700, exist_ok=True)
+        os.makedirs(cls.PATH_PIDS, mode=0o700, exist_ok=True)
+        if not cls.is_pids_directory_private():
+            raise PermissionError(f"The pid directory '{cls.PATH_PIDS}' must belong to the user with mode 0700.")
+
+    @classmethod
+    def register(cls, pgid:int) -> bool:
+        """
+        Records a process group owned by the current process and returns if it was recorded.
+        A failure only leaves the group to the caller, the browser is already running
+        """
+        try:
+            cls.make_pids_directory()
+            owner = psutil.Process()
+            leader = psutil.Process(pgid)
+            state = {'pgid': pgid, 'owner_pid': owner.pid, 'owner_create_time': owner.create_time(),
+                     'leader_create_time': leader.create_time(), 'leader_name': leader.name()}
+            path_tmp = cls.get_pid_file(pgid) + f".{owner.pid}.tmp"
+            with open(path_tmp, 'w') as file:
+                json.dump(state, file)
+            os.replace(path_tmp, cls.get_pid_file(pgid))
+            return True
+        except (OSError, psutil.Error) as e:
+            print(f"Could not register the process group {pgid}: {e}")
+            return False
+
+    @classmethod
+    def read_state(cls, pgid:int) -> dict:
+        """
+        Returns the recorded state of a given process group, or None
+        """
+        try:
+            with open(cls.get_pid_file(pgid), 'r') as pid_file:
+                return json.load(pid_file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def is_same_leader(state:dict) -> bool:
+        """
+        Verifies if the group of a recorded state still belongs to the recorded leader. While any process of a group lives its id
+        can not be reused, so a dead leader leaves only the original group (or none) behind, while a live process with that pid
+        must have the recorded create time and name
+        """
+        try:
+            leader = psutil.Process(state['pgid'])
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.Error:
+            return False
+        try:
+            return leader.create_time() == state.get('leader_create_time') and leader.name() == state.get('leader_name')
+        except psutil.NoSuchProcess:
+            return True
+        except psutil.Error:
+            return False
+
+    @classmethod
+    def unregister(cls, pgid:int):
+        """
+        Forgets a process group
+        """
+        try:
+            os.remove(cls.get_pid_file(pgid))
+        except OSError:
+            pass
+
+    @classmethod
+    def kill_group(cls, pgid:int) -> bool:
+        """
+        Kills a process group and forgets it. Without process groups the process tree of the group leader is killed.
+        Nothing is killed, and False returned, when the group id was reused by a process other than the recorded leader
+        """
+        state = cls.read_state(pgid)
+        if state is not None and not cls.is_same_leader(state):
+            print(f"Process group {pgid} was reused by another process, not killing it.")
+            cls.unregister(pgid)
+            return False
+        try:
+            if cls.supports_process_groups():
+                os.killpg(pgid, signal.SIGKILL)
+            else:
+                leader = psutil.Process(pgid)
+                for child in leader.children(recursive=True):
+                    child.kill()
+                leader.kill()
+        except (OSError, psutil.Error):
+            pass
+        cls.unregister(pgid)
+        return True
+
+    @staticmethod
+    def is_owner_alive(state:dict) -> bool:
+        """
+        Verifies if the process that registered a group is still running (and is not a reused pid)
+        """
+        try:
+            return psutil.Process(state['owner_pid']).create_time() == state['owner_create_time']
+        except psutil.Error:
+            return False
+
+    @classmethod
+    def reap(cls) -> list[int]:
+        """
+        Kills the registered groups whose owner process is dead and returns their ids.
+        Nothing is read from a pid directory that is not private to the user
+        """
+        reaped = list()
+        if not cls.is_pids_directory_private():
+            return reaped
+        try:
+            files = os.listdir(cls.PATH_PIDS)
+        except OSError:
+            return reaped
+        for file in files:
+            if not file.endswith(".pid"):
+                continue
+            try:
+                with open(os.path.join(cls.PATH_PIDS, file), 'r') as pid_file:
+                    state = json.load(pid_file)
+            except (OSError, ValueError):
+                continue
+            if not cls.is_owner_alive(state) and cls.kill_group(state['pgid']):
+                reaped.append(state['pgid'])
+        if reaped:
+            print(f"Reaped orphan chrome process groups: {reaped}")
+        return reaped
+
+    @classmethod
+    def start_reaper(cls, interval:float=None):
+        """
+        Starts a background thread reaping orphan groups periodically, once per process
+        """
+        if cls.__reaper is not None and cls.__reaper.is_alive():
+            return
+        interval = cls.REAPER_INTERVAL if interval is None else interval
+        cls.__reaper_stop.clear()
+        def loop():
+            while not cls.__reaper_stop.is_set():
+                cls.reap()
+                cls.__reaper_stop.wait(interval)
+        cls.__reaper = threading.Thread(target=loop, daemon=True)
+        cls.__reaper.start()
+
+    @classmethod
+    def stop_reaper(cls):
+        """
+        Stops the background reaper
+        """
+        cls.__reaper_stop.set()
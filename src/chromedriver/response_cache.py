@@ -0,0 +1,186 @@
+import os
+import json
+import base64
+import sqlite3
+import threading
+import urllib.parse
+from time import time
+
+from .cdp import CDPConnection
+
+class ResponseCache:
+    """
+    Class to record and replay http responses of a browser session through devtools Fetch interception.
+    Modes:
+        record: every request goes to the origin and its response is stored
+        replay: stored responses are served locally, misses go to the origin and are stored
+        passthrough: no interception
+    Only successful GET responses are stored, bounded by max_size bytes with least recently used eviction.
+    A cache can be shared by many sessions, each one attached and detached under its own session id
+    """
+    RECORD = "record"
+    REPLAY = "replay"
+    PASSTHROUGH = "passthrough"
+    MAX_SIZE = 1024*1024*512    # bytes
+    TTL = 60*60*24              # seconds
+    DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'set-cookie', 'set-cookie2')
+
+    def __init__(self, path_cache:str, mode:str=REPLAY, max_size:int=None, ttl:float=None, ignore_params:list[str]=None, key_function=None, ttl_function=None):
+        """
+        class constructor. 'ignore_params' are query parameters left out of the request key (cache busters, tracking ids),
+        'key_function(method, url)' replaces the default key normalization and 'ttl_function(url, status, headers)' returns
+        the ttl of each recorded response, or None for the default ttl
+        """
+        if mode not in (ResponseCache.RECORD, ResponseCache.REPLAY, ResponseCache.PASSTHROUGH):
+            raise Exception(f"Response cache mode '{mode}' not known.")
+        self.path_cache = os.path.abspath(path_cache)
+        self.mode = mode
+        self.max_size = ResponseCache.MAX_SIZE if max_size is None else max_size
+        self.ttl = ResponseCache.TTL if ttl is None else ttl
+        self.ignore_params = set() if ignore_params is None else set(ignore_params)
+        self.key_function = key_function
+        self.ttl_function = ttl_function
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+        self.connections = dict()   # session id -> connections
+        self.__lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path_cache), exist_ok=True)
+        self.__db = sqlite3.connect(self.path_cache, check_same_thread=False)
+        self.__db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                status INTEGER,
+                                headers TEXT,
+                                body BLOB,
+                                size INTEGER,
+                                expires REAL,
+                                accessed REAL)""")
+        self.__db.commit()
+
+    def get_key(self, method:str, url:str) -> str:
+        """
+        Returns the normalized key of a request: method, url without fragment, ignored params dropped and params sorted
+        """
+        if self.key_function is not None:
+            return self.key_function(method, url)
+        parts = urllib.parse.urlsplit(url)
+        params = [(k, v) for k, v in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if k not in self.ignore_params]
+        query = urllib.parse.urlencode(sorted(params))
+        return f"{method.upper()} {urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ''))}"
+
+    def load(self, key:str) -> tuple:
+        """
+        Returns (status, headers, body) stored for a key, or None when missing or expired
+        """
+        with self.__lock:
+            row = self.__db.execute("SELECT status, headers, body, expires FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[3] < time():
+                self.__db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.__db.commit()
+                return None
+            self.__db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time(), key))
+            self.__db.commit()
+        return row[0], json.loads(row[1]), row[2]
+
+    def store(self, key:str, status:int, headers:list[dict], body:bytes, ttl:float=None):
+        """
+        Stores a response and evicts the least recently used ones above max_size
+        """
+        if len(body) > self.max_size:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        with self.__lock:
+            self.__db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (key, status, json.dumps(headers), body, len(body), time() + ttl, time()))
+            self.stats['stored'] += 1
+            total = self.__db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_size:
+                for old_key, size in self.__db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if total <= self.max_size:
+                        break
+                    self.__db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    self.stats['evicted'] += 1
+                    total -= size
+            self.__db.commit()
+
+    def clear(self):
+        """
+        Removes every stored response
+        """
+        with self.__lock:
+            self.__db.execute("DELETE FROM responses")
+            self.__db.commit()
+
+    def attach(self, connection:CDPConnection, session:str=None):
+        """
+        Starts intercepting the requests of a devtools page connection belonging to a given session
+        """
+        if self.mode == ResponseCache.PASSTHROUGH:
+            return
+        connection.on('Fetch.requestPaused', lambda params: self.__on_request_paused(connection, params))
+        connection.execute('Fetch.enable', {'patterns': [{'urlPattern': '*', 'requestStage': 'Request'},
+                                                         {'urlPattern': '*', 'requestStage': 'Response'}]})
+        with self.__lock:
+            self.connections.setdefault(session, list()).append(connection)
+
+    def detach(self, session:str=None):
+        """
+        Stops the interceptions of a given session and closes their connections, every session when None
+        """
+        with self.__lock:
+            if session is None:
+                connections = [c for session_connections in self.connections.values() for c in session_connections]
+                self.connections.clear()
+            else:
+                connections = self.connections.pop(session, list())
+        for connection in connections:
+            try:
+                connection.execute('Fetch.disable')
+            except Exception:
+                pass
+            connection.close()
+
+    def close(self):
+        """
+        Detaches the sessions and closes the database
+        """
+        self.detach()
+        with self.__lock:
+            self.__db.close()
+
+    def __on_request_paused(self, connection:CDPConnection, params:dict):
+        """
+        Serves a paused request from the cache, or stores its response when paused at the response stage
+        """
+        request_id = params['requestId']
+        method = params['request']['method']
+        key = self.get_key(method, params['request']['url'])
+        try:
+            if 'responseStatusCode' not in params and 'responseErrorReason' not in params:
+                if method == 'GET' and self.mode == ResponseCache.REPLAY:
+                    cached = self.load(key)
+                    if cached is not None:
+                        self.stats['hits'] += 1
+                        status, headers, body = cached
+                        connection.execute('Fetch.fulfillRequest', {'requestId': request_id,
+                                                                    'responseCode': status,
+                                                                    'responseHeaders': headers,
+                                                                    'body': base64.b64encode(body).decode()})
+                        return
+                    self.stats['misses'] += 1
+            elif method == 'GET' and 200 <= params.get('responseStatusCode', 0) < 300:
+                result = connection.execute('Fetch.getResponseBody', {'requestId': request_id})
+                body = base64.b64decode(result['body']) if result.get('base64Encoded') else result['body'].encode()
+                # the body is stored decoded, so the encoding headers of the origin must not be replayed,
+                # nor the cookies, which would overwrite the session state of whoever replays the response
+                headers = [h for h in params.get('responseHeaders', list()) if h['name'].lower() not in ResponseCache.DROPPED_HEADERS]
+                ttl = None
+                if self.ttl_function is not None:
+                    ttl = self.ttl_function(params['request']['url'], params['responseStatusCode'], params.get('responseHeaders', list()))
+                self.store(key, params['responseStatusCode'], headers, body, ttl)
+        except Exception as e:
+            print(f"Response cache error for '{key}': {e!r}")
+        try:
+            connection.execute('Fetch.continueRequest', {'requestId': request_id})
+        except Exception:
+            pass
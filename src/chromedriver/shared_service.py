@@ -0,0 +1,123 @@
+import os
+import atexit
+import threading
+from selenium.webdriver.chrome.service import Service
+
+from .process_registry import ProcessRegistry
+
+class SharedService(Service):
+    """
+    Class to share a single chromedriver server between many browser sessions of the same process.
+    Every Chrome session started with it calls start/stop, which only count the attached sessions: the server process
+    is started by the first session and kept running for the next ones until shutdown (called at exit)
+    """
+    __instances = dict()
+    __instances_lock = threading.Lock()
+
+    def __init__(self, path_chromedriver:str=None, keep_running:bool=True, **kwargs):
+        """
+        class constructor. With keep_running False the server stops when its last session quits
+        """
+        kwargs.setdefault('popen_kw', ProcessRegistry.get_popen_kw())
+        if path_chromedriver is None:
+            super().__init__(**kwargs)
+        else:
+            super().__init__(executable_path=path_chromedriver, **kwargs)
+        self.keep_running = keep_running
+        self.sessions = 0
+        self.__lock = threading.Lock()
+
+    def __del__(self):
+        # the server lifetime is handled by shutdown, not by the garbage collector of the sessions
+        pass
+
+    @classmethod
+    def get(cls, path_chromedriver:str=None) -> 'SharedService':
+        """
+        Returns the shared service of a given chromedriver executable, creating it on first use
+        """
+        with cls.__instances_lock:
+            service = cls.__instances.get(path_chromedriver)
+            if service is None:
+                service = cls(path_chromedriver)
+                cls.__instances[path_chromedriver] = service
+            return service
+
+    @classmethod
+    def shutdown_all(cls):
+        """
+        Stops every shared chromedriver server of the process
+        """
+        with cls.__instances_lock:
+            services = list(cls.__instances.values())
+            cls.__instances.clear()
+        for service in services:
+            service.shutdown()
+
+    @classmethod
+    def get_pids(cls) -> list[int]:
+        """
+        Returns the process ids of the running shared chromedriver servers
+        """
+        with cls.__instances_lock:
+            services = list(cls.__instances.values())
+        return [service.pid for service in services if service.is_running()]
+
+    def is_running(self) -> bool:
+        """
+        Verifies if the chromedriver server process is running
+        """
+        process = getattr(self, 'process', None)
+        return process is not None and process.poll() is None
+
+    @property
+    def pid(self) -> int:
+        """
+        Returns the chromedriver server process id, or None when it is not running
+        """
+        return self.process.pid if self.is_running() else None
+
+    def start(self):
+        """
+        Attaches a session, starting the chromedriver server when it is not running
+        """
+        with self.__lock:
+            if not self.is_running():
+                if getattr(self.log_file, 'closed', False):
+                    # a previous stop closed the log file, the server is being started again
+                    self.log_file = open(os.devnull, 'wb')
+                super().start()
+                if ProcessRegistry.supports_process_groups():
+                    if ProcessRegistry.register(self.process.pid):
+                        ProcessRegistry.start_reaper()
+            self.sessions += 1
+
+    def stop(self):
+        """
+        Detaches a session, the server keeps running for the other sessions
+        """
+        with self.__lock:
+            self.sessions = max(self.sessions - 1, 0)
+            if self.sessions == 0 and not self.keep_running:
+                self.__stop_process()
+
+    def shutdown(self):
+        """
+        Stops the chromedriver server regardless of the attached sessions
+        """
+        with self.__lock:
+            self.sessions = 0
+            if getattr(self, 'process', None) is not None:
+                self.__stop_process()
+
+    def __stop_process(self):
+        """
+        Stops the server and kills its process group, taking along any browser left behind
+        """
+        pgid = self.process.pid
+        super().stop()
+        if ProcessRegistry.supports_process_groups():
+            ProcessRegistry.kill_group(pgid)
+
+
+atexit.register(SharedService.shutdown_all)
@@ -0,0 +1,133 @@
+from time import sleep, monotonic
+from selenium.common.exceptions import WebDriverException
+
+from .chromedriver import Chromedriver
+
+class TabPool:
+    """
+    Class to crawl many pages concurrently with the tabs of a single browser.
+    Navigations are issued to every free tab at once and the pages are handed to the callback as their tabs finish loading.
+    Loads always overlap, but tabs are only harvested in completion order when the Chromedriver was created with
+    page_load_strategy 'none' (or 'eager'), otherwise chromedriver blocks on the still loading tab being polled.
+    The timeout is checked between polls, so under the 'normal' strategy a blocked poll is only bounded by the page load
+    timeout of the driver and the pool timeout applies after it returns.
+    The resource blocking of the Chromedriver is set on its startup window only and does not apply to the pool tabs
+    """
+    TIMEOUT = 60    # seconds
+    TAB_NAME = "chromedriver_tab_{}"
+    SCRIPT_MARK_STALE = "window.__chromedriverStale = true;"
+    # the previous document of a reused tab is marked stale and a new tab starts on about:blank, both are 'complete' before the navigation commits
+    SCRIPT_IS_LOADED = ("return document.readyState === 'complete' && !window.__chromedriverStale"
+                        " && (document.URL !== 'about:blank' || arguments[0] === 'about:blank');")
+
+    def __init__(self, chromedriver:Chromedriver, size:int=4, timeout:float=None, poll_frequency:float=.05):
+        """
+        class constructor
+        """
+        self.chromedriver = chromedriver
+        self.size = size
+        self.timeout = TabPool.TIMEOUT if timeout is None else timeout
+        self.poll_frequency = poll_frequency
+        self.control_window = chromedriver.driver.current_window_handle
+        self.tabs = [None]*size     # window handle of each tab, opened on first use
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __navigate(self, index:int, url:str):
+        """
+        Starts loading a url in a given tab without waiting for it. The tab is reused through its window name
+        """
+        if self.tabs[index] is not None:
+            self.chromedriver.switch_window(self.tabs[index])
+            self.chromedriver.driver.execute_script(TabPool.SCRIPT_MARK_STALE)
+        self.chromedriver.switch_window(self.control_window)
+        handles = set(self.chromedriver.driver.window_handles)
+        self.chromedriver.driver.execute_script("window.open(arguments[0], arguments[1]);", url, TabPool.TAB_NAME.format(index))
+        if self.tabs[index] is None:
+            new_handles = set(self.chromedriver.driver.window_handles) - handles
+            if len(new_handles) != 1:
+                raise Exception("Could not open a new tab, check if pop ups are blocked.")
+            self.tabs[index] = new_handles.pop()
+
+    def __is_loaded(self, index:int, url:str) -> bool:
+        """
+        Verifies if the page requested in a given tab finished loading
+        """
+        self.chromedriver.switch_window(self.tabs[index])
+        return self.chromedriver.driver.execute_script(TabPool.SCRIPT_IS_LOADED, url) is True
+
+    def map(self, urls, fn, return_exceptions:bool=False):
+        """
+        Loads every url in the tab pool and yields (url, fn(chromedriver)) as each tab finishes, with the chromedriver switched to that tab.
+        With return_exceptions the errors (including TimeoutError for pages that did not load in time) are yielded as results instead of raised
+        """
+        urls = iter(urls)
+        busy = dict()   # tab index -> (url, start time)
+        free = list(range(self.size))
+        exhausted = False
+        try:
+            while True:
+                while free and not exhausted:
+                    url = next(urls, None)
+                    if url is None:
+                        exhausted = True
+                        break
+                    index = free.pop(0)
+                    self.__navigate(index, url)
+                    busy[index] = (url, monotonic())
+                if not busy:
+                    return
+                finished = list()
+                for index, (url, start) in busy.items():
+                    try:
+                        if self.__is_loaded(index, url):
+                            finished.append((index, url, None))
+                        elif monotonic() - start > self.timeout:
+                            finished.append((index, url, TimeoutError(f"Page '{url}' not loaded after {self.timeout} seconds.")))
+                    except WebDriverException as e:
+                        finished.append((index, url, e))
+                for index, url, error in finished:
+                    del busy[index]
+                    free.append(index)
+                    if error is None:
+                        try:
+                            self.chromedriver.switch_window(self.tabs[index])
+                            result = fn(self.chromedriver)
+                        except Exception as e:
+                            error = e
+                    if error is not None:
+                        if not return_exceptions:
+                            raise error
+                        result = error
+                    yield url, result
+                if not finished:
+                    sleep(self.poll_frequency)
+        finally:
+            if busy:
+                # stops the loads left behind by an abandoned iteration
+                for index in busy:
+                    try:
+                        self.chromedriver.switch_window(self.tabs[index])
+                        self.chromedriver.driver.execute_script("window.stop();")
+                    except WebDriverException:
+                        pass
+            self.chromedriver.switch_window(self.control_window)
+
+    def close(self):
+        """
+        Closes the pool tabs and switches back to the control window
+        """
+        for index, handle in enumerate(self.tabs):
+            if handle is None:
+                continue
+            try:
+                self.chromedriver.switch_window(handle)
+                self.chromedriver.driver.close()
+            except WebDriverException:
+                pass
+            self.tabs[index] = None
+        self.chromedriver.switch_window(self.control_window)
@@ -0,0 +1,119 @@
+import os
+import json
+import hashlib
+import tempfile
+from time import time
+
+from .os_utils import OSUtils
+
+class VersionCache:
+    """
+    Class to persist the versions resolved by ChromedriverManager between runs.
+    Chrome versions are keyed on the browser binary path and mtime, chromedriver versions on the driver file hash
+    and the major version -> downloadable chromedriver version index expires after a TTL
+    """
+    INDEX_TTL = 60*60*24    # seconds
+    PATH_CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                              "chromedriver_module",
+                              "versions.json")
+
+    def __init__(self, path:str=None, index_ttl:float=None):
+        """
+        class constructor
+        """
+        self.path = os.path.abspath(path) if path is not None else VersionCache.PATH_CACHE
+        self.index_ttl = VersionCache.INDEX_TTL if index_ttl is None else index_ttl
+        self.data = self.__load()
+
+    def __load(self) -> dict:
+        """
+        Reads the cache file, an unreadable or missing file is an empty cache
+        """
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+            if isinstance(data, dict):
+                return data
+        except (OSError, ValueError):
+            pass
+        return dict()
+
+    def __save(self, section:str, key:str, value):
+        """
+        Writes an entry to the cache file. The file is re-read and merged under a lock, so concurrent processes keep
+        each other's entries, and replaced atomically, so they never read a partial file
+        """
+        self.data.setdefault(section, dict())[key] = value
+        path_dir = os.path.dirname(self.path)
+        try:
+            os.makedirs(path_dir, exist_ok=True)
+            with OSUtils.file_lock(self.path + ".lock"):
+                data = self.__load()
+                data.setdefault(section, dict())[key] = value
+                fd, path_tmp = tempfile.mkstemp(dir=path_dir, prefix=".versions-", suffix=".tmp")
+                with os.fdopen(fd, 'w') as file:
+                    json.dump(data, file)
+                os.replace(path_tmp, self.path)
+            self.data = data
+        except OSError as e:
+            print(f"Could not write the chromedriver version cache: {e}")
+
+    @staticmethod
+    def hash_file(path_file:str) -> str:
+        """
+        Returns the sha256 of a given file
+        """
+        sha256 = hashlib.sha256()
+        with open(path_file, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024*1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def get_chrome_version(self, path_chrome:str) -> str:
+        """
+        Returns the cached chrome version of a given binary, or None when the binary changed since it was cached
+        """
+        entry = self.data.get("chrome", dict()).get(path_chrome)
+        try:
+            if entry is not None and entry["mtime"] == os.path.getmtime(path_chrome):
+                return entry["version"]
+        except OSError:
+            pass
+        return None
+
+    def set_chrome_version(self, path_chrome:str, version:str):
+        """
+        Caches the chrome version of a given binary
+        """
+        try:
+            mtime = os.path.getmtime(path_chrome)
+        except OSError:
+            return
+        self.__save("chrome", path_chrome, {"mtime": mtime, "version": version})
+
+    def get_chromedriver_version(self, file_hash:str) -> str:
+        """
+        Returns the cached version of the chromedriver with the given file hash
+        """
+        return self.data.get("chromedriver", dict()).get(file_hash)
+
+    def set_chromedriver_version(self, file_hash:str, version:str):
+        """
+        Caches the version of the chromedriver with the given file hash
+        """
+        self.__save("chromedriver", file_hash, version)
+
+    def get_download_index(self, url:str) -> dict:
+        """
+        Returns the cached major version -> chromedriver version index of a given storage url, or None when it expired
+        """
+        entry = self.data.get("index", dict()).get(url)
+        if entry is not None and time() - entry["time"] < self.index_ttl:
+            return entry["versions"]
+        return None
+
+    def set_download_index(self, url:str, versions:dict):
+        """
+        Caches the major version -> chromedriver version index of a given storage url
+        """
+        self.__save("index", url, {"time": time(), "versions": versions})
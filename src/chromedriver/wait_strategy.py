@@ -0,0 +1,347 @@
+import asyncio
+from abc import ABC, abstractmethod
+from time import sleep, monotonic
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.common.by import By
+
+class WaitStrategy(ABC):
+    """
+    Base class of the strategies used by Chromedriver to wait for the page after an interaction
+    """
+    TIMEOUT = 10    # seconds
+    DEFAULT_TIMEOUT = 2     # seconds, cap of the default strategy so pages that never stop mutating don't stall every interaction
+
+    def __init__(self, timeout:float=None):
+        """
+        class constructor
+        """
+        self.timeout = WaitStrategy.TIMEOUT if timeout is None else timeout
+
+    def prepare(self, driver, xpath:str=None):
+        """
+        Called before the interaction with the element it targets, when there is one, for the strategies that must observe
+        what the interaction triggers
+        """
+        pass
+
+    @abstractmethod
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        """
+        Waits until the page is ready. 'xpath' is the element just interacted with, when there is one, and 'delay' is the fixed delay historically used by the caller
+        """
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        """
+        Awaitable version of wait for AsyncChromedriver. 'run(fn, *args)' awaits a blocking driver call on the session thread,
+        the pauses between polls are awaited on the event loop. By default the blocking wait runs on the session thread
+        """
+        await run(self.wait, driver, xpath, delay)
+
+    @staticmethod
+    def default() -> 'WaitStrategy':
+        """
+        Returns the strategy used when none is given: the page is ready as soon as the element is stable and the DOM stops changing
+        """
+        return CompositeWait(ElementStable(WaitStrategy.DEFAULT_TIMEOUT), DomQuiescence(WaitStrategy.DEFAULT_TIMEOUT))
+
+
+class FixedDelay(WaitStrategy):
+    """
+    Sleeps for a fixed amount of time. Without seconds it keeps the legacy delay of each Chromedriver method
+    """
+    def __init__(self, seconds:float=None):
+        """
+        class constructor
+        """
+        super().__init__()
+        self.seconds = seconds
+
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        seconds = delay if self.seconds is None else self.seconds
+        if seconds > 0:
+            sleep(seconds)
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        seconds = delay if self.seconds is None else self.seconds
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+
+class ElementClickable(WaitStrategy):
+    """
+    Waits until the element is enabled and visible. Returns right away when the element is gone or hidden after the interaction
+    """
+    def __init__(self, timeout:float=None, poll_frequency:float=.05):
+        """
+        class constructor
+        """
+        super().__init__(timeout)
+        self.poll_frequency = poll_frequency
+
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        if xpath is None:
+            return
+        try:
+            elements = driver.find_elements(By.XPATH, value=xpath)
+            if len(elements) == 0 or not elements[0].is_displayed():
+                return
+            WebDriverWait(driver, self.timeout, self.poll_frequency).until(EC.element_to_be_clickable(elements[0]))
+        except (TimeoutException, WebDriverException):
+            return
+
+    @staticmethod
+    def is_done(driver, xpath:str) -> bool:
+        """
+        Single poll of the async wait: the element is gone, hidden or clickable
+        """
+        try:
+            elements = driver.find_elements(By.XPATH, value=xpath)
+            if len(elements) == 0 or not elements[0].is_displayed():
+                return True
+            return bool(EC.element_to_be_clickable(elements[0])(driver))
+        except WebDriverException:
+            return True
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        if xpath is None:
+            return
+        deadline = monotonic() + self.timeout
+        while monotonic() < deadline:
+            if await run(ElementClickable.is_done, driver, xpath):
+                return
+            await asyncio.sleep(self.poll_frequency)
+
+
+class ElementStable(WaitStrategy):
+    """
+    Waits until the element position and size stop changing (animations, layout shifts). The first sample is compared with
+    the one taken by prepare, so an element that did not move returns after a single round trip
+    """
+    SCRIPT_RECT = """
+        const result = document.evaluate(arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null);
+        const element = result.singleNodeValue;
+        if (!element) return null;
+        const rect = element.getBoundingClientRect();
+        return [rect.x, rect.y, rect.width, rect.height];
+    """
+
+    def __init__(self, timeout:float=None, poll_frequency:float=.05):
+        """
+        class constructor
+        """
+        super().__init__(timeout)
+        self.poll_frequency = poll_frequency
+        self.rects = dict()     # session id -> (xpath, rect) sampled before the interaction
+
+    def prepare(self, driver, xpath:str=None):
+        self.rects.pop(driver.session_id, None)
+        if xpath is None:
+            return
+        try:
+            self.rects[driver.session_id] = (xpath, driver.execute_script(ElementStable.SCRIPT_RECT, xpath))
+        except WebDriverException:
+            pass
+
+    def get_prepared_rect(self, driver, xpath:str) -> list:
+        """
+        Returns (and forgets) the rect sampled by prepare for a given element, or None
+        """
+        prepared = self.rects.pop(driver.session_id, None)
+        return prepared[1] if prepared is not None and prepared[0] == xpath else None
+
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        if xpath is None:
+            return
+        deadline = monotonic() + self.timeout
+        last_rect = self.get_prepared_rect(driver, xpath)
+        while monotonic() < deadline:
+            try:
+                rect = driver.execute_script(ElementStable.SCRIPT_RECT, xpath)
+            except WebDriverException:
+                # the element may be gone after the interaction (closed modal, navigation), which is not an error here
+                return
+            if rect is None or rect == last_rect:
+                return
+            last_rect = rect
+            sleep(self.poll_frequency)
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        if xpath is None:
+            return
+        deadline = monotonic() + self.timeout
+        last_rect = self.get_prepared_rect(driver, xpath)
+        while monotonic() < deadline:
+            try:
+                rect = await run(driver.execute_script, ElementStable.SCRIPT_RECT, xpath)
+            except WebDriverException:
+                return
+            if rect is None or rect == last_rect:
+                return
+            last_rect = rect
+            await asyncio.sleep(self.poll_frequency)
+
+
+class DomQuiescence(WaitStrategy):
+    """
+    Waits until the document is loaded and no DOM mutation happened during 'quiet_period' seconds.
+    Attribute changes only count with 'attributes', pages animating attributes (spinners, clocks, carousels) would otherwise
+    hold every wait until the timeout
+    """
+    SCRIPT = """
+        const quietPeriod = arguments[0];
+        const timeout = arguments[1];
+        const attributes = arguments[2];
+        const done = arguments[arguments.length - 1];
+        const start = Date.now();
+        let timer = null;
+        let observer = null;
+        const finish = () => { if (observer) observer.disconnect(); done(true); };
+        const arm = () => {
+            clearTimeout(timer);
+            if (Date.now() - start > timeout) { finish(); return; }
+            timer = setTimeout(finish, quietPeriod);
+        };
+        const observe = () => {
+            observer = new MutationObserver(arm);
+            observer.observe(document, {subtree: true, childList: true, attributes: attributes, characterData: true});
+            arm();
+        };
+        if (document.readyState === 'complete') observe();
+        else window.addEventListener('load', observe, {once: true});
+    """
+    # polled by the async wait: installs the observer once per document and returns the milliseconds since the last mutation
+    SCRIPT_POLL = """
+        if (window.__chromedriverLastMutation === undefined) {
+            window.__chromedriverLastMutation = Date.now();
+            new MutationObserver(() => { window.__chromedriverLastMutation = Date.now(); })
+                .observe(document, {subtree: true, childList: true, attributes: arguments[0], characterData: true});
+        }
+        return document.readyState === 'complete' ? Date.now() - window.__chromedriverLastMutation : -1;
+    """
+
+    def __init__(self, timeout:float=None, quiet_period:float=.05, attributes:bool=False):
+        """
+        class constructor
+        """
+        super().__init__(timeout)
+        self.quiet_period = quiet_period
+        self.attributes = attributes
+        self.sessions = set()   # sessions whose script timeout was checked
+
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        try:
+            if driver.session_id not in self.sessions:
+                # once per session, the script timeout is only raised when it is shorter than this wait
+                if driver.timeouts.script < self.timeout + 1:
+                    driver.set_script_timeout(self.timeout + 1)
+                self.sessions.add(driver.session_id)
+            driver.execute_async_script(DomQuiescence.SCRIPT, int(self.quiet_period*1000), int(self.timeout*1000), self.attributes)
+        except WebDriverException:
+            # a navigation triggered by the interaction discards the script, the next command waits for the page load
+            pass
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        # the browser side wait of SCRIPT would hold the session thread, the quiet time is polled instead
+        deadline = monotonic() + self.timeout
+        try:
+            while monotonic() < deadline:
+                quiet = await run(driver.execute_script, DomQuiescence.SCRIPT_POLL, self.attributes)
+                if quiet is None or quiet >= self.quiet_period*1000:
+                    return
+                await asyncio.sleep(self.quiet_period)
+        except WebDriverException:
+            pass
+
+
+class NetworkIdle(WaitStrategy):
+    """
+    Waits until the document is loaded and every fetch/XMLHttpRequest started by the page is finished
+    """
+    SCRIPT_INSTALL = """
+        if (window.__chromedriverPending !== undefined) return;
+        window.__chromedriverPending = 0;
+        const originalFetch = window.fetch;
+        if (originalFetch) {
+            window.fetch = function() {
+                window.__chromedriverPending++;
+                return originalFetch.apply(this, arguments).finally(() => window.__chromedriverPending--);
+            };
+        }
+        const originalSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function() {
+            window.__chromedriverPending++;
+            this.addEventListener('loadend', () => window.__chromedriverPending--, {once: true});
+            return originalSend.apply(this, arguments);
+        };
+    """
+    SCRIPT_PENDING = "return document.readyState === 'complete' ? (window.__chromedriverPending || 0) : -1;"
+
+    def __init__(self, timeout:float=None, poll_frequency:float=.05):
+        """
+        class constructor
+        """
+        super().__init__(timeout)
+        self.poll_frequency = poll_frequency
+        self.sessions = set()   # sessions with the counters installed on new documents
+
+    def prepare(self, driver, xpath:str=None):
+        """
+        Installs the request counters before the interaction, so the requests it triggers are counted: in the current document
+        and, once per session, in every document loaded afterwards
+        """
+        try:
+            if driver.session_id not in self.sessions:
+                driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': f"(function() {{ {NetworkIdle.SCRIPT_INSTALL} }})();"})
+                self.sessions.add(driver.session_id)
+            driver.execute_script(NetworkIdle.SCRIPT_INSTALL)
+        except WebDriverException:
+            pass
+
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        deadline = monotonic() + self.timeout
+        try:
+            driver.execute_script(NetworkIdle.SCRIPT_INSTALL)
+            while monotonic() < deadline:
+                if driver.execute_script(NetworkIdle.SCRIPT_PENDING) == 0:
+                    return
+                sleep(self.poll_frequency)
+        except WebDriverException:
+            pass
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        deadline = monotonic() + self.timeout
+        try:
+            await run(driver.execute_script, NetworkIdle.SCRIPT_INSTALL)
+            while monotonic() < deadline:
+                if await run(driver.execute_script, NetworkIdle.SCRIPT_PENDING) == 0:
+                    return
+                await asyncio.sleep(self.poll_frequency)
+        except WebDriverException:
+            pass
+
+
+class CompositeWait(WaitStrategy):
+    """
+    Runs a sequence of strategies one after the other
+    """
+    def __init__(self, *strategies:WaitStrategy):
+        """
+        class constructor
+        """
+        super().__init__()
+        self.strategies = strategies
+
+    def prepare(self, driver, xpath:str=None):
+        for strategy in self.strategies:
+            strategy.prepare(driver, xpath)
+
+    def wait(self, driver, xpath:str=None, delay:float=0):
+        for strategy in self.strategies:
+            strategy.wait(driver, xpath, delay)
+
+    async def wait_async(self, driver, run, xpath:str=None, delay:float=0):
+        for strategy in self.strategies:
+            await strategy.wait_async(driver, run, xpath, delay)
+
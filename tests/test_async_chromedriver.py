@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from src.chromedriver import AsyncChromedriver, Metrics
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.fixture_site import FixtureSite
+
+
+@pytest.fixture(scope="module")
+def site():
+    with FixtureSite() as fixture_site:
+        yield fixture_site
+
+
+@pytest.fixture
+def path_chromedriver(tmp_path):
+    return FakeWebDriver.create_executable(str(tmp_path / "driver"))
+
+
+def test_interactions_share_the_sync_steps_and_are_timed(site, path_chromedriver):
+    async def main():
+        metrics = Metrics()
+        chrome = await AsyncChromedriver.create(path_chromedriver=path_chromedriver, headless=True, metrics=metrics)
+        try:
+            await chrome.get(site.url + "/form?fields=5")
+            results = await chrome.run_actions([{'action': 'set_value', 'xpath': "//*[@id='field_0']", 'value': "text"},
+                                                {'action': 'press_key', 'xpath': "//*[@id='field_0']", 'value': "tab"},
+                                                {'action': 'select', 'xpath': "//*[@id='field_4']", 'value': "beta", 'real_keys': True}],
+                                               wait=0)
+            await chrome.drop_down("//*[@id='field_4']", "gamma", wait=0)
+            await chrome.escape(wait=0)
+        finally:
+            await chrome.close()
+        return results, metrics.to_dict()
+    results, histograms = asyncio.run(main())
+    assert results == [{'ok': True, 'error': None}]*3
+    assert histograms["method.run_actions"]["count"] == 1
+    assert histograms["method.drop_down"]["count"] == 1
+    assert histograms["method.escape"]["count"] == 1
+    assert "command.clearElement" not in histograms
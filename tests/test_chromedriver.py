@@ -0,0 +1,89 @@
+import pytest
+
+from src.chromedriver import Chromedriver, Metrics
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.fixture_site import FixtureSite
+
+
+@pytest.fixture(scope="module")
+def site():
+    with FixtureSite() as fixture_site:
+        yield fixture_site
+
+
+@pytest.fixture
+def new_chromedriver(tmp_path):
+    path_chromedriver = FakeWebDriver.create_executable(str(tmp_path / "driver"))
+    chromedrivers = list()
+    def new(**kwargs):
+        chromedriver = Chromedriver(path_chromedriver=path_chromedriver, headless=True, **kwargs)
+        chromedrivers.append(chromedriver)
+        return chromedriver
+    yield new
+    for chromedriver in chromedrivers:
+        chromedriver.close()
+
+
+def test_cookie_survives_recycle(site, new_chromedriver):
+    chrome = new_chromedriver()
+    chrome.get(site.url + "/item/1")
+    chrome.driver.add_cookie({'name': "token", 'value': "abc"})
+    session_id = chrome.driver.session_id
+    chrome.recycle()
+    assert chrome.driver.session_id != session_id
+    assert [(c['name'], c['value']) for c in chrome.driver.get_cookies()] == [("token", "abc")]
+    assert chrome.driver.current_url == site.url + "/item/1"
+
+
+def test_recycle_from_get_navigates_once(site, new_chromedriver):
+    metrics = Metrics()
+    chrome = new_chromedriver(metrics=metrics, recycle_navigations=1)
+    chrome.get(site.url + "/item/1")
+    chrome.driver.add_cookie({'name': "token", 'value': "abc"})
+    chrome.get(site.url + "/item/2")
+    assert chrome.recycle_count == 1
+    # one navigation per get, the url of the recycled browser is not restored first
+    assert metrics.to_dict()["command.get"]["count"] == 2
+    assert chrome.driver.current_url == site.url + "/item/2"
+    assert [c['name'] for c in chrome.driver.get_cookies()] == ["token"]
+
+
+def test_press_key_runs_through_webdriver_without_clearing(site, new_chromedriver):
+    metrics = Metrics()
+    chrome = new_chromedriver(metrics=metrics)
+    chrome.get(site.url + "/form?fields=2")
+    results = chrome.run_actions([{'action': 'set_value', 'xpath': "//*[@id='field_0']", 'value': "text"},
+                                  {'action': 'press_key', 'xpath': "//*[@id='field_0']", 'value': "enter"}], wait=0)
+    assert results == [{'ok': True, 'error': None}, {'ok': True, 'error': None}]
+    commands = metrics.to_dict()
+    assert commands["command.sendKeysToElement"]["count"] == 1
+    assert "command.clearElement" not in commands
+
+
+def test_element_cache_is_opt_in_and_dropped_after_interactions(site, new_chromedriver):
+    chrome = new_chromedriver(cache_elements=True)
+    chrome.get(site.url + "/form?fields=2")
+    chrome.get_element_attribute("//*[@id='field_0']", 'name')
+    chrome.get_element_attribute("//*[@id='field_0']", 'name')
+    assert chrome.element_cache.get_stats()['hits'] == 1
+    chrome.click("//*[@id='submit']", wait=0)
+    assert len(chrome.element_cache) == 0
+    assert new_chromedriver().element_cache.enabled is False
+
+
+def test_reset_clears_the_storage_of_the_frame_origins(site, new_chromedriver):
+    chrome = new_chromedriver()
+    chrome.get(site.url + "/item/1")
+    execute_cdp_cmd = chrome.driver.execute_cdp_cmd
+    cleared = list()
+    def spy(cmd, params):
+        if cmd == 'Page.getFrameTree':
+            return {'frameTree': {'frame': {'url': site.url + "/item/1", 'securityOrigin': site.url},
+                                  'childFrames': [{'frame': {'url': "https://frame.example/embed", 'securityOrigin': "https://frame.example"}}]}}
+        if cmd == 'Storage.clearDataForOrigin':
+            cleared.append(params['origin'])
+        return execute_cdp_cmd(cmd, params)
+    chrome.driver.execute_cdp_cmd = spy
+    chrome.reset()
+    assert sorted(cleared) == sorted([site.url, "https://frame.example"])
+    assert chrome.visited_origins == set()
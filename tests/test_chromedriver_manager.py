@@ -0,0 +1,42 @@
+import os
+import stat
+import sys
+
+import pytest
+
+from src.chromedriver import ChromedriverManager, VersionCache
+
+
+def write_driver(path_dir, version):
+    os.makedirs(path_dir, exist_ok=True)
+    path_file = os.path.join(path_dir, "chromedriver")
+    with open(path_file, 'w') as file:
+        file.write(f"#!/bin/sh\necho 'ChromeDriver {version}'\n")
+    os.chmod(path_file, os.stat(path_file).st_mode | stat.S_IXUSR)
+    return path_file
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    if sys.platform.startswith("win"):
+        pytest.skip("shell script drivers")
+    monkeypatch.setattr(ChromedriverManager, "version_cache", VersionCache(str(tmp_path / "versions.json")))
+    monkeypatch.setattr(ChromedriverManager, "get_chrome_version", classmethod(lambda cls: "114.0.5735.198"))
+    monkeypatch.setattr(ChromedriverManager, "download_chromedriver", classmethod(lambda cls, path: pytest.fail("downloaded")))
+    return ChromedriverManager
+
+
+def test_installed_version_is_found(manager, tmp_path):
+    path_dir = tmp_path / "drivers"
+    write_driver(str(path_dir), "113.0.5672.63")
+    write_driver(str(path_dir / "113.0.5672.63"), "113.0.5672.63")
+    expected = write_driver(str(path_dir / "114.0.5735.90"), "114.0.5735.90")
+    assert manager.manage_chromedriver(str(path_dir)) == expected
+    assert manager.manage_chromedriver(str(path_dir / "chromedriver")) == expected
+
+
+def test_newest_installed_version_first(manager, tmp_path):
+    path_dir = tmp_path / "drivers"
+    write_driver(str(path_dir / "114.0.5735.16"), "114.0.5735.16")
+    expected = write_driver(str(path_dir / "114.0.5735.90"), "114.0.5735.90")
+    assert manager.manage_chromedriver(str(path_dir)) == expected
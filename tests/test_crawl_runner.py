@@ -0,0 +1,42 @@
+import os
+import threading
+
+import pytest
+
+from src.chromedriver import CrawlRunner
+from benchmarks.fake_webdriver import FakeWebDriver
+
+
+def title(chrome, task):
+    return task
+
+
+def unpicklable(chrome, task):
+    return threading.Lock()
+
+
+def die(chrome, task):
+    os._exit(1)
+
+
+@pytest.fixture
+def path_chromedriver(tmp_path):
+    return FakeWebDriver.create_executable(str(tmp_path / "driver"))
+
+
+def test_results(path_chromedriver):
+    runner = CrawlRunner(title, processes=2, path_chromedriver=path_chromedriver)
+    assert sorted(result for _, result in runner.run(range(6))) == list(range(6))
+
+
+def test_unpicklable_result_is_an_error(path_chromedriver):
+    runner = CrawlRunner(unpicklable, processes=1, path_chromedriver=path_chromedriver)
+    results = list(runner.run([1, 2], return_exceptions=True))
+    assert len(results) == 2
+    assert all(isinstance(result, Exception) and "not picklable" in str(result) for _, result in results)
+
+
+def test_dead_worker_is_reported(path_chromedriver):
+    runner = CrawlRunner(die, processes=1, max_retries=1, path_chromedriver=path_chromedriver)
+    results = list(runner.run([1], return_exceptions=True))
+    assert len(results) == 1 and "died" in str(results[0][1])
@@ -0,0 +1,81 @@
+import os
+import json
+import subprocess
+import sys
+
+import psutil
+import pytest
+
+from src.chromedriver import ProcessRegistry
+
+pytestmark = pytest.mark.skipif(not ProcessRegistry.supports_process_groups(), reason="needs process groups")
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(ProcessRegistry, "PATH_PIDS", str(tmp_path / "chromedriver_module-test" / "pids"))
+    return ProcessRegistry
+
+
+@pytest.fixture
+def group():
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"], **ProcessRegistry.get_popen_kw())
+    yield process
+    process.kill()
+    process.wait()
+
+
+def orphan(registry, pgid):
+    path_file = registry.get_pid_file(pgid)
+    with open(path_file) as file:
+        state = json.load(file)
+    state['owner_create_time'] -= 1     # the owner looks like a reused pid, so it is dead
+    with open(path_file, 'w') as file:
+        json.dump(state, file)
+    return state
+
+
+def test_register_in_a_private_directory(registry, group):
+    registry.register(group.pid)
+    state = registry.read_state(group.pid)
+    assert state['leader_create_time'] == psutil.Process(group.pid).create_time()
+    assert os.stat(os.path.dirname(registry.PATH_PIDS)).st_mode & 0o777 == 0o700
+
+
+def test_reap_kills_orphan_groups(registry, group):
+    registry.register(group.pid)
+    orphan(registry, group.pid)
+    assert registry.reap() == [group.pid]
+    assert group.wait(5) is not None
+    assert registry.read_state(group.pid) is None
+
+
+def test_reap_spares_a_reused_group_id(registry, group):
+    registry.register(group.pid)
+    state = orphan(registry, group.pid)
+    state['leader_create_time'] -= 1
+    with open(registry.get_pid_file(group.pid), 'w') as file:
+        json.dump(state, file)
+    assert registry.reap() == []
+    assert group.poll() is None
+    assert registry.read_state(group.pid) is None
+
+
+def test_register_failure_is_not_fatal(registry, group):
+    path_user = os.path.dirname(registry.PATH_PIDS)
+    os.makedirs(path_user, mode=0o755)
+    os.chmod(path_user, 0o755)
+    registry.register(group.pid)
+    assert registry.read_state(group.pid) is None
+
+
+def test_reap_ignores_a_directory_open_to_others(registry, group):
+    os.makedirs(registry.PATH_PIDS, mode=0o755)
+    os.chmod(os.path.dirname(registry.PATH_PIDS), 0o755)
+    forged = {'pgid': group.pid, 'owner_pid': os.getpid(), 'owner_create_time': 0,
+              'leader_create_time': psutil.Process(group.pid).create_time(), 'leader_name': psutil.Process(group.pid).name()}
+    with open(registry.get_pid_file(group.pid), 'w') as file:
+        json.dump(forged, file)
+    assert registry.register(group.pid) is False
+    assert registry.reap() == []
+    assert group.poll() is None
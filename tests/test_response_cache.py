@@ -0,0 +1,162 @@
+import base64
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from src.chromedriver import ResponseCache
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        OriginHandler.requests += 1
+        body = f"{self.path} {OriginHandler.requests}".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", f"visit={OriginHandler.requests}")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeConnection:
+    """
+    Devtools page connection whose 'browser' fetches the paused requests from the origin with urllib
+    """
+    def __init__(self):
+        self.callbacks = dict()
+        self.enabled = False
+        self.closed = False
+        self.pending = dict()
+        self.bodies = dict()
+        self.served = None
+        self.served_headers = None
+        self.next_id = 0
+
+    def on(self, event, callback):
+        self.callbacks[event] = callback
+
+    def close(self):
+        self.closed = True
+
+    def execute(self, method, params=None):
+        if method == 'Fetch.enable':
+            self.enabled = True
+        elif method == 'Fetch.disable':
+            self.enabled = False
+        elif method == 'Fetch.fulfillRequest':
+            self.served = ('cache', base64.b64decode(params['body']))
+            self.served_headers = params['responseHeaders']
+        elif method == 'Fetch.getResponseBody':
+            return {'body': base64.b64encode(self.bodies[params['requestId']][2]).decode(), 'base64Encoded': True}
+        elif method == 'Fetch.continueRequest':
+            request_id = params['requestId']
+            if request_id in self.bodies:
+                self.served = ('origin', self.bodies.pop(request_id)[2])
+            else:
+                url = self.pending[request_id]
+                with urllib.request.urlopen(url) as response:
+                    self.bodies[request_id] = (response.status, [{'name': k, 'value': v} for k, v in response.getheaders()], response.read())
+                status, headers, _ = self.bodies[request_id]
+                self.callbacks['Fetch.requestPaused']({'requestId': request_id, 'request': {'method': 'GET', 'url': url},
+                                                       'responseStatusCode': status, 'responseHeaders': headers})
+        return dict()
+
+    def request(self, url):
+        if not self.enabled:
+            with urllib.request.urlopen(url) as response:
+                return 'origin', response.read()
+        self.next_id += 1
+        request_id = str(self.next_id)
+        self.pending[request_id] = url
+        self.callbacks['Fetch.requestPaused']({'requestId': request_id, 'request': {'method': 'GET', 'url': url}})
+        return self.served
+
+
+@pytest.fixture
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OriginHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    OriginHandler.requests = 0
+    yield "http://%s:%d" % server.server_address[:2]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    def new_cache(**kwargs):
+        response_cache = ResponseCache(str(tmp_path / "responses.sqlite"), **kwargs)
+        caches.append(response_cache)
+        return response_cache
+    caches = list()
+    yield new_cache
+    for response_cache in caches:
+        response_cache.close()
+
+
+def test_miss_then_hit(origin, cache):
+    response_cache = cache()
+    connection = FakeConnection()
+    response_cache.attach(connection, "session")
+    assert connection.request(origin + "/page?b=2&a=1") == ('origin', b"/page?b=2&a=1 1")
+    assert connection.request(origin + "/page?a=1&b=2#top") == ('cache', b"/page?b=2&a=1 1")
+    assert OriginHandler.requests == 1
+    assert response_cache.stats['hits'] == 1 and response_cache.stats['misses'] == 1 and response_cache.stats['stored'] == 1
+
+
+def test_record_mode_always_fetches(origin, cache):
+    response_cache = cache(mode=ResponseCache.RECORD)
+    connection = FakeConnection()
+    response_cache.attach(connection, "session")
+    connection.request(origin + "/page")
+    assert connection.request(origin + "/page") == ('origin', b"/page 2")
+
+
+def test_ttl_expiry(origin, cache):
+    response_cache = cache(ttl=0)
+    connection = FakeConnection()
+    response_cache.attach(connection, "session")
+    connection.request(origin + "/page")
+    assert connection.request(origin + "/page") == ('origin', b"/page 2")
+
+
+def test_ttl_function(origin, cache):
+    response_cache = cache(ttl_function=lambda url, status, headers: 0 if url.endswith("/fresh") else None)
+    connection = FakeConnection()
+    response_cache.attach(connection, "session")
+    for path in ("/fresh", "/static", "/fresh", "/static"):
+        connection.request(origin + path)
+    assert OriginHandler.requests == 3
+    assert connection.request(origin + "/static")[0] == 'cache'
+
+
+def test_hit_does_not_replay_cookies(origin, cache):
+    response_cache = cache()
+    connection = FakeConnection()
+    response_cache.attach(connection, "session")
+    connection.request(origin + "/page")
+    assert connection.request(origin + "/page")[0] == 'cache'
+    names = [header['name'].lower() for header in connection.served_headers]
+    assert 'content-type' in names and 'set-cookie' not in names
+
+
+def test_detach_only_the_given_session(origin, cache):
+    response_cache = cache()
+    first, second = FakeConnection(), FakeConnection()
+    response_cache.attach(first, "first")
+    response_cache.attach(second, "second")
+    response_cache.detach("first")
+    assert first.closed and not first.enabled
+    assert not second.closed and second.enabled
+    assert second.request(origin + "/page") == ('origin', b"/page 1")
+    assert second.request(origin + "/page")[0] == 'cache'
+    response_cache.detach()
+    assert second.closed and not second.enabled
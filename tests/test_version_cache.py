@@ -0,0 +1,83 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from src.chromedriver import ChromedriverManager, VersionCache
+
+LISTING = (b'<?xml version="1.0" encoding="UTF-8"?>'
+           b'<ListBucketResult xmlns="http://doc.s3.amazonaws.com/2006-03-01">'
+           b'<Contents><Key>113.0.5672.63/chromedriver_linux64.zip</Key></Contents>'
+           b'<Contents><Key>114.0.5735.90/chromedriver_linux64.zip</Key></Contents>'
+           b'<Contents><Key>114.0.5735.16/chromedriver_linux64.zip</Key></Contents>'
+           b'<Contents><Key>index.html</Key></Contents>'
+           b'</ListBucketResult>')
+
+
+class StorageHandler(BaseHTTPRequestHandler):
+    requests = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        StorageHandler.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(LISTING)))
+        self.end_headers()
+        self.wfile.write(LISTING)
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StorageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StorageHandler.requests = 0
+    monkeypatch.setattr(ChromedriverManager, "STORAGE_URL", "http://%s:%d" % server.server_address[:2])
+    monkeypatch.setattr(ChromedriverManager, "get_chrome_version", classmethod(lambda cls: "114.0.5735.198"))
+    yield ChromedriverManager.STORAGE_URL
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_index_is_cached(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(ChromedriverManager, "version_cache", VersionCache(str(tmp_path / "versions.json")))
+    assert ChromedriverManager.get_download_compatible_version() == "114.0.5735.90"
+    assert ChromedriverManager.get_download_compatible_version() == "114.0.5735.90"
+    assert StorageHandler.requests == 1
+    assert VersionCache(str(tmp_path / "versions.json")).get_download_index(storage) == {'113': "113.0.5672.63", '114': "114.0.5735.90"}
+
+
+def test_expired_download_index_is_fetched_again(storage, tmp_path, monkeypatch):
+    monkeypatch.setattr(ChromedriverManager, "version_cache", VersionCache(str(tmp_path / "versions.json"), index_ttl=0))
+    ChromedriverManager.get_download_compatible_version()
+    ChromedriverManager.get_download_compatible_version()
+    assert StorageHandler.requests == 2
+
+
+def test_concurrent_caches_keep_each_other_entries(storage, tmp_path, monkeypatch):
+    path = str(tmp_path / "versions.json")
+    first, second = VersionCache(path), VersionCache(path)
+    monkeypatch.setattr(ChromedriverManager, "version_cache", first)
+    ChromedriverManager.get_download_compatible_version()
+    second.set_chromedriver_version("hash-a", "114.0.5735.90")
+    first.set_chromedriver_version("hash-b", "113.0.5672.63")
+    cache = VersionCache(path)
+    assert cache.get_download_index(storage) is not None
+    assert cache.get_chromedriver_version("hash-a") == "114.0.5735.90"
+    assert cache.get_chromedriver_version("hash-b") == "113.0.5672.63"
+
+
+def test_concurrent_writers(tmp_path):
+    path = str(tmp_path / "versions.json")
+    caches = [VersionCache(path) for _ in range(4)]
+    threads = [threading.Thread(target=lambda c=c, i=i: [c.set_chromedriver_version(f"hash-{i}-{j}", str(j)) for j in range(5)])
+               for i, c in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cache = VersionCache(path)
+    assert all(cache.get_chromedriver_version(f"hash-{i}-{j}") == str(j) for i in range(4) for j in range(5))
@@ -0,0 +1,66 @@
+from time import monotonic
+from types import SimpleNamespace
+
+from src.chromedriver import ElementStable, DomQuiescence, WaitStrategy
+
+
+class StubDriver:
+    """
+    Records the calls the wait strategies make, answering every rect script with the same rect
+    """
+    def __init__(self, script_timeout:float=30):
+        self.session_id = "session"
+        self.timeouts = SimpleNamespace(script=script_timeout)
+        self.scripts = list()
+        self.async_scripts = list()
+        self.script_timeouts = list()
+
+    def execute_script(self, script, *args):
+        self.scripts.append(args)
+        return [0, 0, 100, 20]
+
+    def execute_async_script(self, script, *args):
+        self.async_scripts.append(args)
+        return True
+
+    def set_script_timeout(self, seconds):
+        self.script_timeouts.append(seconds)
+        self.timeouts.script = seconds
+
+
+def test_element_not_moved_returns_without_polling():
+    driver = StubDriver()
+    strategy = ElementStable(poll_frequency=1)
+    strategy.prepare(driver, "//button")
+    start = monotonic()
+    strategy.wait(driver, "//button")
+    assert monotonic() - start < .5
+    assert len(driver.scripts) == 2
+
+
+def test_rect_of_another_element_is_not_reused():
+    driver = StubDriver()
+    strategy = ElementStable(poll_frequency=.01)
+    strategy.prepare(driver, "//a")
+    strategy.wait(driver, "//button")
+    assert len(driver.scripts) == 3
+
+
+def test_script_timeout_is_set_once_per_session_and_only_raised():
+    driver = StubDriver(script_timeout=30)
+    strategy = DomQuiescence(timeout=2)
+    strategy.wait(driver)
+    strategy.wait(driver)
+    assert driver.script_timeouts == []
+    assert [args[2] for args in driver.async_scripts] == [False, False]
+
+    driver = StubDriver(script_timeout=1)
+    strategy = DomQuiescence(timeout=2)
+    strategy.wait(driver)
+    strategy.wait(driver)
+    assert driver.script_timeouts == [3]
+
+
+def test_default_strategy_ignores_attribute_mutations():
+    strategy = WaitStrategy.default()
+    assert all(not getattr(child, 'attributes', False) for child in strategy.strategies)